@@ -0,0 +1,68 @@
+"""Time and allocations per rendered panel, built from scratch vs. rendered from a template
+
+/status used to build all four status containers for every call and now renders one.
+
+Run from the repository root: python benchmarks/components.py
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+from discord import SeparatorSpacingSize
+from discord.ui import Container, MediaGallery
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from components import BANNERS, STATUS_FOOTER, render
+
+
+def benchmark(rounds=20000):
+    def claimed_from_scratch():
+        container = Container()
+        gallery = MediaGallery()
+        gallery.add_item(BANNERS["support_tickets"])
+        container.add_item(gallery)
+        container.add_text("# Ticket Claimed")
+        container.add_separator(spacing=SeparatorSpacingSize.small)
+        container.add_text("<@1> has claimed the ticket and will assist you shortly.")
+        return container
+
+    def status_from_scratch():
+        # /status used to build all four status containers and send one of them
+        containers = []
+        for title, label in (("🔴 Failure for", "Reason"), ("🟠 Issue for", "Details"), ("🔵 Maintenance for", "Info"), ("🟢 Online:", None)):
+            gallery = MediaGallery()
+            gallery.add_item(BANNERS["server_status"])
+            container = Container()
+            container.add_item(gallery)
+            container.add_text(f"## {title} Bot")
+            container.add_separator(spacing=SeparatorSpacingSize.small)
+            container.add_text((f"**{label}:**\n" if label else "") + "Down\n" + STATUS_FOOTER)
+            containers.append(container)
+        return containers[0]
+
+    cases = (
+        ("claim panel", claimed_from_scratch, lambda: render("ticket_claimed", staff="<@1>")),
+        ("/status", status_from_scratch, lambda: render("status_failure", bot="Bot", message="Down"))
+    )
+    for case, from_scratch, from_template in cases:
+        assert from_scratch().to_component_dict() == from_template().to_component_dict()
+        for name, build in (("from scratch", from_scratch), ("template", from_template)):
+            started = time.perf_counter()
+            for _ in range(rounds):
+                build().to_component_dict()
+            cpu = (time.perf_counter() - started) / rounds
+
+            # Bytes allocated for the objects of one rendered panel, kept alive until it is sent
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            panels = [build() for _ in range(1000)]
+            allocated = (tracemalloc.get_traced_memory()[0] - before) / len(panels)
+            tracemalloc.stop()
+            del panels
+            print(f"{case:>12} {name:>12}: {cpu * 1e6:6.1f} µs, {allocated:7.0f} B per panel")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,69 @@
+"""Memory, add cost and top-10 accuracy of the SpaceSaving member summary vs. exact counting
+
+One day of messages from a growing number of distinct authors (Zipf-like activity,
+author IDs shaped like Discord snowflakes). The summary stays at HEAVY_HITTER_CAPACITY
+counters however many authors there are; the exact counter grows with every author.
+
+Run from the repository root: python benchmarks/space_saving.py
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cogs.stats import HEAVY_HITTER_CAPACITY, SpaceSaving
+
+
+def message_stream(authors, messages, seed=1):
+    rng = random.Random(seed)
+    ids = [10 ** 17 + rng.randrange(10 ** 17) for _ in range(authors)]
+    weights = [1 / (rank + 1) for rank in range(authors)]
+    # Every author writes at least once, so all of them are distinct keys of the day
+    stream = ids + rng.choices(ids, weights, k=messages - authors)
+    rng.shuffle(stream)
+    return stream
+
+
+def measure(build, stream):
+    started = time.perf_counter()
+    build(stream)
+    duration = time.perf_counter() - started
+
+    # Measured apart from the timing, tracemalloc slows down every allocation
+    tracemalloc.start()
+    counter = build(stream)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return counter, size, duration
+
+
+def space_saving(stream):
+    summary = SpaceSaving()
+    for author in stream:
+        summary.add(author)
+    return summary
+
+
+def benchmark(messages=300000):
+    print(f"{messages} messages per day, {HEAVY_HITTER_CAPACITY} counters per summary")
+    for authors in (1000, 10000, 100000):
+        stream = message_stream(authors, messages)
+        summary, summary_bytes, summary_time = measure(space_saving, stream)
+        exact, exact_bytes, exact_time = measure(Counter, stream)
+
+        top = [author for author, _ in SpaceSaving.merged_top([summary], 10)]
+        exact_top = [author for author, _ in exact.most_common(10)]
+        print(
+            f"{authors:>7} authors: SpaceSaving {summary_bytes / 1024:7.1f} KiB "
+            f"{summary_time / messages * 1e9:5.0f} ns/add, "
+            f"exact {exact_bytes / 1024:7.1f} KiB {exact_time / messages * 1e9:5.0f} ns/add, "
+            f"top 10 {len(set(top) & set(exact_top))}/10, {len(summary.counts)} counters kept"
+        )
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,62 @@
+"""Index build and /ticket search query times over synthetic archived messages
+
+Run from the repository root: python benchmarks/ticket_search.py
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+import pytz
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cogs.ticketsystem import TRANSCRIPT_PAGE_SIZE, TicketStore
+
+
+async def benchmark_search(messages=100000, tickets=1000, path="data/search_benchmark.db"):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    store = TicketStore(path)
+    words = [f"word{index}" for index in range(5000)] + ["payment", "bug", "refund", "login", "crash", "server"]
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    random.seed(1)
+
+    started = time.perf_counter()
+    per_ticket = messages // tickets
+    for ticket in range(tickets):
+        channel_id = 10 ** 6 + ticket
+        await store.create(1, channel_id, ticket, f"ticket-user{ticket}")
+        entries = [
+            {
+                "id": channel_id * 1000 + index,
+                "author": f"user{ticket}",
+                "created_at": datetime.now(pytz.utc).isoformat(),
+                "content": " ".join(random.choices(words, weights, k=random.randint(4, 30)))
+                + (" someone reported the payment bug" if (ticket * per_ticket + index) % 500 == 0 else "")
+            }
+            for index in range(per_ticket)
+        ]
+        for start in range(0, len(entries), TRANSCRIPT_PAGE_SIZE):
+            await store.add_search_entries(channel_id, entries[start:start + TRANSCRIPT_PAGE_SIZE])
+        await store.set_transcript(channel_id, f"{channel_id}.ndjson.gz")
+    build = time.perf_counter() - started
+    print(f"Indexed {per_ticket * tickets} messages of {tickets} tickets in {build:.1f}s "
+          f"({build / tickets * 1000:.1f} ms per closed ticket), {os.path.getsize(path) / 2 ** 20:.1f} MiB")
+
+    for query in ("payment bug", "crash", "word42", "word4999 refund", "nothing"):
+        timings = []
+        for _ in range(50):
+            query_started = time.perf_counter()
+            results = await store.search_transcripts(query)
+            timings.append(time.perf_counter() - query_started)
+        timings.sort()
+        print(f"{query!r:>20}: {len(results)} tickets, p50 {timings[25] * 1000:.2f} ms, p99 {timings[-1] * 1000:.2f} ms")
+    await store.close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark_search())
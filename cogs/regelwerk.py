@@ -1,16 +1,12 @@
 import discord
 from discord.ext import commands, tasks
-from discord.ui import Container
-from discord import SeparatorSpacingSize
 import ezcord
 import random
 import string
 import datetime
 from typing import Dict, List
 
-# Config
-BANNER_URL = "https://cdn.discordapp.com/attachments/1420436338284695657/1428764646650679316/server-rules.png?ex=68f3b044&is=68f25ec4&hm=c2cbb71a7dbef0982116668881cef37933785e8ac7cb9d8a540f15ae7b578fcc&"
-EMOJI = "<:dot:1421834173127069778>"
+from components import render
 
 class UserData:
     def __init__(self):
@@ -75,65 +71,10 @@ class RulesSystem(ezcord.Cog):
         return 100.0 if total == 0 else round((self.stats['total_verifications'] / total) * 100, 1)
 
     def create_unified_rules_container(self) -> discord.ui.View:
-        container = Container()
-        banner = discord.ui.MediaGallery()
-        banner.add_item(BANNER_URL)
-        container.add_item(banner)
-
-        # Alle Regeln
-        container.add_text("## SERVER RULES & GUIDELINES")
-        container.add_separator(spacing=SeparatorSpacingSize.small)
-        container.add_text(
-            "Welcome to **OPPRO.NET Network**! Please read and accept our community guidelines.\n"
-            "**By joining this server, you agree to follow these rules and our digital house rights.**\n\n"
-        )
-        # Community Standards
-        container.add_text(
-            f"## 🤝 **Community Standards**\n"
-            f"{EMOJI} Be respectful and kind to all members\n"
-            f"{EMOJI} No harassment, hate speech, or discrimination\n"
-            f"{EMOJI} Keep conversations appropriate and family-friendly\n"
-            f"{EMOJI} No spam, excessive caps, or disruptive behavior\n"
-            f"{EMOJI} Political discussions are strictly prohibited\n\n"
-        )
-        container.add_separator(spacing=SeparatorSpacingSize.small)
-        # Prohibited Content
-        container.add_text(
-            f"## 🚫 **Prohibited Content**\n"
-            f"{EMOJI} NSFW, illegal, or harmful content\n"
-            f"{EMOJI} Personal information or doxxing\n"
-            f"{EMOJI} Advertising without permission\n"
-            f"{EMOJI} Malware, viruses, or malicious links\n\n"
-        )
-        container.add_separator(spacing=SeparatorSpacingSize.small)
-        # Enforcement
-        container.add_text(
-            f"## ⚖️ **Enforcement**\n"
-            f"{EMOJI} **1st Violation:** Warning\n"
-            f"{EMOJI} **2nd Violation:** Temporary timeout\n"
-            f"{EMOJI} **3rd Violation:** Permanent ban\n\n"
-        )
-        container.add_separator(spacing=SeparatorSpacingSize.small)
-        # Digital House Rights
-        container.add_text(
-            f"## 🏠 **Digital House Rights**\n"
-            f"{EMOJI} **OPPRO.NET Network** reserves full moderation rights\n"
-            f"{EMOJI} Staff decisions are final and binding\n"
-            f"{EMOJI} We maintain the right to remove disruptive users\n"
-            f"{EMOJI} Server access is a privilege, not a right\n\n"
-        )
-        # Support & Appeals
-        container.add_text(
-            f"## 📞 **Support & Appeals**\n"
-            f"{EMOJI} Contact staff for questions or rule clarifications\n"
-            f"{EMOJI} Report violations through proper channels\n"
-            f"{EMOJI} Appeals must be submitted respectfully\n\n"
-        )
-        # Footer
-        container.add_text(
-            "───────────────────────────────────\n"
-            f"**© 2024 OPPRO.NET Network** • *Rules may be updated without notice*\n"
-            f"**Total Verifications:** `{self.stats['total_verifications']}` • **Success Rate:** `{self.calculate_success_rate()}%`"
+        container = render(
+            "rules",
+            verifications=self.stats['total_verifications'],
+            success_rate=self.calculate_success_rate()
         )
 
         view = discord.ui.View(timeout=None)
@@ -1,50 +1,1300 @@
 import discord
 from discord.ext import commands, tasks
+from discord import Option
 import json
 import os
-from datetime import datetime, timedelta
-from collections import defaultdict
+import calendar
+import sqlite3
+import aiosqlite
+from aiocache import SimpleMemoryCache
+from aiocache.plugins import HitMissRatioPlugin
+from datetime import datetime, timedelta, timezone
+from collections import defaultdict, OrderedDict
 import asyncio
+import base64
+import zlib
+import gzip
+import io
+import hashlib
+import heapq
+import math
+from array import array
+
+# Write-behind settings: increments only touch memory and are persisted every
+# STATS_FLUSH_INTERVAL seconds or as soon as STATS_FLUSH_THRESHOLD increments
+# are pending, whichever comes first.
+STATS_FLUSH_INTERVAL = 30
+STATS_FLUSH_THRESHOLD = 500
+
+# Storage backend: "json" keeps the hot statistics in one file, "sqlite" keeps
+# them in an indexed database. Days older than STATS_HOT_DAYS are compacted into
+# compressed monthly blocks in an append-only archive (a gzip file next to the
+# JSON file, or the archive table) and only read back when a query reaches them.
+STATS_BACKEND = "json"
+STATS_JSON_FILE = "data/server_stats.json"
+STATS_ARCHIVE_FILE = "data/server_stats_archive.ndjson.gz"
+STATS_DB_FILE = "data/server_stats.db"
+STATS_HOT_DAYS = 30
+
+# /statistics accepts ranges of up to STATS_MAX_QUERY_DAYS days and shows at
+# most MAX_BREAKDOWN_ROWS buckets of the breakdown
+STATS_MAX_QUERY_DAYS = 365
+MAX_BREAKDOWN_ROWS = 14
+GRANULARITIES = ("Hour", "Day", "Week", "Month")
+
+# How often the incrementally maintained member counts are checked against the cache
+MEMBER_RECONCILE_HOURS = 6
+
+# Exports are built in memory and cut into parts well below Discord's 10 MiB
+# upload limit. The limit applies to all attachments of a message together, so
+# parts are grouped into messages by their summed size (with some headroom for
+# the request itself), at most 10 attachments each
+EXPORT_FORMATS = ("JSON", "NDJSON", "CSV")
+EXPORT_PART_BYTES = 8 * 1024 * 1024
+EXPORT_MESSAGE_BYTES = 9 * 1024 * 1024
+EXPORT_FILES_PER_MESSAGE = 10
+EXPORT_EARLIEST_DATE = "2015-01-01"
+
+# Distinct active members per day are estimated with a HyperLogLog sketch of
+# 2^HLL_PRECISION one-byte registers (4 KiB, ~1.6% standard error); daily
+# sketches are kept long enough to merge them into a monthly estimate
+HLL_PRECISION = 12
+HLL_RETENTION_DAYS = 30
+ACTIVE_MEMBER_METRICS = ("messages", "reactions_added", "voice_joins")
+
+# Statistics recorded before they were scoped per guild belong to the home guild
+STATS_HOME_GUILD_ID = 1428835818792947884
+
+# Only the most recently active channels keep their own counters, so memory
+# grows with the number of active keys instead of the number of events
+MAX_TRACKED_CHANNELS = 500
+
+# Members are tracked as heavy hitters: a Space-Saving summary with a fixed
+# number of counters per day, merged over the window when queried
+HEAVY_HITTER_CAPACITY = 100
+HEAVY_HITTER_DAYS = 30
+TOP_LIST_SIZE = 10
+
+# History backfill: text channels are crawled newest to oldest with at most
+# BACKFILL_CONCURRENCY channels in flight (py-cord already waits on the rate
+# limit buckets reported in the response headers). The position and partial
+# per-day counts of every channel are checkpointed, so an interrupted backfill
+# resumes where it stopped when the command is run again.
+BACKFILL_CONCURRENCY = 3
+BACKFILL_CHECKPOINT_FILE = "data/stats_backfill.json"
+BACKFILL_CHECKPOINT_MESSAGES = 1000
+BACKFILL_PROGRESS_SECONDS = 15
+BACKFILL_MAX_RETRIES = 5
+BACKFILL_MAX_DAYS = 3650
+
+# Rendered command responses are cached for a short time; flushing a guild's
+# counters, a reset or a backfill bumps its version, which makes older entries
+# unreachable. Between flushes a response is at most RESPONSE_CACHE_TTL old
+RESPONSE_CACHE_TTL = 30
+
+# Rollup resolutions: per-minute buckets for 24 hours and per-hour buckets for
+# 90 days live in fixed-size ring buffers, per-day buckets are kept indefinitely
+MINUTE_BUCKETS = 24 * 60
+HOUR_BUCKETS = 90 * 24
+
+DAILY_METRICS = (
+    "new_members",
+    "left_members",
+    "messages",
+    "voice_joins",
+    "reactions_added",
+    "commands_used",
+    "channels_created",
+    "roles_created"
+)
+
+
+def date_to_bucket(date_str):
+    """Convert a YYYY-MM-DD string to the unix timestamp of that day (UTC midnight)"""
+    return calendar.timegm(datetime.strptime(date_str, "%Y-%m-%d").timetuple())
+
+
+def bucket_to_date(bucket_start):
+    """Convert a day bucket timestamp back to a YYYY-MM-DD string"""
+    return datetime.fromtimestamp(bucket_start, timezone.utc).strftime("%Y-%m-%d")
+
+
+def date_to_ordinal(date_str):
+    """Convert a YYYY-MM-DD string to its proleptic Gregorian ordinal"""
+    return datetime.strptime(date_str, "%Y-%m-%d").toordinal()
+
+
+def ordinal_to_date(ordinal):
+    """Convert a date ordinal back to a YYYY-MM-DD string"""
+    return datetime.fromordinal(ordinal).strftime("%Y-%m-%d")
+
+
+def minute_index(moment):
+    """Absolute minute number of a (local) datetime"""
+    return moment.toordinal() * 1440 + moment.hour * 60 + moment.minute
+
+
+def hour_index(moment):
+    """Absolute hour number of a (local) datetime; index % 24 is the hour of day"""
+    return moment.toordinal() * 24 + moment.hour
+
+
+def create_empty_totals():
+    """Create empty all-time totals"""
+    return {
+        "total_members": 0,
+        "total_messages": 0,
+        "total_joins": 0,
+        "total_leaves": 0
+    }
+
+
+def create_empty_day():
+    """Create empty statistics for a single day"""
+    return {metric: 0 for metric in DAILY_METRICS}
+
+
+def write_file_atomic(path, payload):
+    """Crash-safe write: write a temp file, fsync it, then rename it over the old one"""
+    tmp_file = f"{path}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+
+def group_by_month(days):
+    """Split {"YYYY-MM-DD": {metric: value}} into {"YYYY-MM": {...}} archive blocks"""
+    months = defaultdict(dict)
+    for date_str, values in sorted(days.items()):
+        months[date_str[:7]][date_str] = values
+    return months
+
+
+def merge_archive_days(result, days, start_date, end_date):
+    """Copy the days of an archive block that fall into start..end into `result`
+    
+    A block holds the full value of every (day, metric) it lists and later blocks
+    win, so a day that was archived twice (e.g. after a crash between archiving and
+    saving the hot file) simply overwrites itself.
+    """
+    for date_str, values in days.items():
+        if start_date <= date_str <= end_date:
+            result.setdefault(date_str, create_empty_day()).update(values)
+
+
+def append_archive(path, lines):
+    """Append records to the archive as one more gzip member (gzip readers concatenate members)"""
+    payload = gzip.compress(("\n".join(lines) + "\n").encode("utf-8"))
+    with open(path, 'ab') as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def iter_archive(path):
+    """Yield the records of an archive file, stopping at a truncated trailing member"""
+    if not os.path.exists(path):
+        return
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    except (EOFError, gzip.BadGzipFile) as e:
+        print(f"Statistics archive {path} ends with a damaged block: {e}")
+
+
+def read_archive(path, guild_id, start_date, end_date):
+    """Days of one guild between two YYYY-MM-DD dates from an archive file"""
+    result = {}
+    for record in iter_archive(path):
+        if record["guild_id"] == guild_id and start_date[:7] <= record["month"] <= end_date[:7]:
+            merge_archive_days(result, record["days"], start_date, end_date)
+    return result
+
+
+def remove_from_archive(path, guild_id):
+    """Rewrite the archive without one guild (only used by /reset_stats)"""
+    if not os.path.exists(path):
+        return
+    lines = [json.dumps(record) for record in iter_archive(path) if record["guild_id"] != guild_id]
+    tmp_file = f"{path}.tmp"
+    with open(tmp_file, 'wb') as f:
+        f.write(gzip.compress(("\n".join(lines) + "\n").encode("utf-8")) if lines else b"")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+
+class BoundedCounters:
+    """Daily counters per key (channel/member) that keep only the most recently active keys"""
+    
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self.counters = OrderedDict()  # key -> {"YYYY-MM-DD": {metric: value}}
+    
+    def add(self, key, date_str, metric, amount=1):
+        days = self.counters.get(key)
+        if days is None:
+            days = self.counters[key] = {}
+            if len(self.counters) > self.max_keys:
+                self.counters.popitem(last=False)
+        else:
+            self.counters.move_to_end(key)
+        day = days.setdefault(date_str, {})
+        day[metric] = day.get(metric, 0) + amount
+    
+    def totals(self, dates, metric):
+        """Aggregate a metric over the given dates per key, only when queried"""
+        result = {}
+        for key, days in self.counters.items():
+            value = sum(days[date_str].get(metric, 0) for date_str in dates if date_str in days)
+            if value:
+                result[key] = value
+        return result
+    
+    def prune(self, cutoff_str):
+        """Drop days older than cutoff and forget keys without remaining activity"""
+        removed = 0
+        for key in list(self.counters):
+            days = self.counters[key]
+            for date_str in [d for d in days if d < cutoff_str]:
+                del days[date_str]
+                removed += 1
+            if not days:
+                del self.counters[key]
+        return removed
+    
+    def to_dict(self):
+        return {str(key): days for key, days in self.counters.items()}
+    
+    @classmethod
+    def from_dict(cls, data, max_keys):
+        bounded = cls(max_keys)
+        for key, days in data.items():
+            bounded.counters[int(key)] = days
+        while len(bounded.counters) > max_keys:
+            bounded.counters.popitem(last=False)
+        return bounded
+
+
+class RingBuffer:
+    """Fixed-size ring of int counters addressed by an absolute, ever-increasing bucket index"""
+    
+    def __init__(self, size):
+        self.size = size
+        self.values = array('i', bytes(4 * size))
+        self.head = None  # absolute index of the newest bucket
+    
+    def add(self, index, amount=1):
+        if self.head is None or index - self.head >= self.size:
+            if self.head is not None:
+                self.values = array('i', bytes(4 * self.size))
+            self.head = index
+        elif index > self.head:
+            # Buckets we skipped over belong to a previous lap and must be cleared
+            for skipped in range(self.head + 1, index + 1):
+                self.values[skipped % self.size] = 0
+            self.head = index
+        elif self.head - index >= self.size:
+            return  # Older than the ring covers
+        self.values[index % self.size] += amount
+    
+    def get(self, index):
+        if self.head is None or index > self.head or self.head - index >= self.size:
+            return 0
+        return self.values[index % self.size]
+    
+    def window(self, end, count):
+        """Values of the `count` buckets ending at absolute index `end`, oldest first"""
+        return [self.get(index) for index in range(end - count + 1, end + 1)]
+    
+    def to_dict(self):
+        return {
+            "head": self.head,
+            "values": base64.b64encode(zlib.compress(self.values.tobytes())).decode("ascii")
+        }
+    
+    @classmethod
+    def from_dict(cls, data, size):
+        ring = cls(size)
+        values = array('i', zlib.decompress(base64.b64decode(data["values"])))
+        if len(values) == size:
+            ring.values = values
+            ring.head = data["head"]
+        return ring
+
+
+class DaySeries:
+    """Per-day counters in a growable int array whose first element is day `origin` (date ordinal)
+    
+    `prefix` holds the running total up to each day, so the sum over any range of
+    days is two lookups. `base` is the running total of days trimmed off the front.
+    """
+    
+    def __init__(self):
+        self.origin = None
+        self.values = array('q')
+        self.prefix = array('q')
+        self.base = 0
+    
+    def add(self, ordinal, amount=1):
+        if self.origin is None:
+            self.origin = ordinal
+        elif ordinal < self.origin:
+            missing = self.origin - ordinal
+            self.values[0:0] = array('q', bytes(8 * missing))
+            self.prefix[0:0] = array('q', [self.base]) * missing
+            self.origin = ordinal
+        offset = ordinal - self.origin
+        if offset >= len(self.values):
+            missing = offset + 1 - len(self.values)
+            last = self.prefix[-1] if self.prefix else self.base
+            self.values.frombytes(bytes(8 * missing))
+            self.prefix.extend(array('q', [last]) * missing)
+        self.values[offset] += amount
+        # Live increments hit the newest day, so this normally touches one entry
+        for index in range(offset, len(self.prefix)):
+            self.prefix[index] += amount
+    
+    def range_sum(self, start, end):
+        """Sum of the days start..end (ordinals, inclusive) from two prefix lookups"""
+        if self.origin is None:
+            return 0
+        first = max(start, self.origin) - self.origin
+        last = min(end, self.origin + len(self.values) - 1) - self.origin
+        if first > last:
+            return 0
+        before = self.prefix[first - 1] if first > 0 else self.base
+        return self.prefix[last] - before
+    
+    def trim_before(self, ordinal):
+        """Forget days older than `ordinal` while keeping the prefix sums valid"""
+        if self.origin is None or ordinal <= self.origin:
+            return 0
+        count = min(ordinal - self.origin, len(self.values))
+        if count:
+            self.base = self.prefix[count - 1]
+            del self.values[:count]
+            del self.prefix[:count]
+        self.origin += count
+        return count
+    
+    def get(self, ordinal):
+        if self.origin is None:
+            return 0
+        offset = ordinal - self.origin
+        if 0 <= offset < len(self.values):
+            return self.values[offset]
+        return 0
+    
+    def items(self):
+        """(ordinal, value) pairs for every day with activity"""
+        return [(self.origin + offset, value) for offset, value in enumerate(self.values) if value]
+
+
+class RollupSeries:
+    """One metric at minute, hour and day resolution
+    
+    Every increment lands in all three resolutions at O(1), so each coarser bucket
+    always equals the rollup of the finer buckets it covers.
+    """
+    
+    def __init__(self):
+        self.minutes = RingBuffer(MINUTE_BUCKETS)
+        self.hours = RingBuffer(HOUR_BUCKETS)
+        self.days = DaySeries()
+    
+    def add(self, moment, amount=1):
+        self.minutes.add(minute_index(moment), amount)
+        self.hours.add(hour_index(moment), amount)
+        self.days.add(moment.toordinal(), amount)
+    
+    def rollups_to_dict(self):
+        return {"minutes": self.minutes.to_dict(), "hours": self.hours.to_dict()}
+    
+    def load_rollups(self, data):
+        self.minutes = RingBuffer.from_dict(data["minutes"], MINUTE_BUCKETS)
+        self.hours = RingBuffer.from_dict(data["hours"], HOUR_BUCKETS)
+
+
+class HyperLogLog:
+    """Fixed-size cardinality sketch for counting distinct member IDs"""
+    
+    REGISTERS = 1 << HLL_PRECISION
+    RANK_BITS = 64 - HLL_PRECISION
+    ALPHA = 0.7213 / (1 + 1.079 / REGISTERS)
+    POWERS = [2.0 ** -rank for rank in range(RANK_BITS + 2)]
+    ERROR = 1.04 / math.sqrt(REGISTERS)
+    
+    def __init__(self, registers=None):
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.REGISTERS)
+    
+    def add(self, member_id):
+        digest = hashlib.blake2b(member_id.to_bytes(8, "little"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        index = value >> self.RANK_BITS
+        rank = self.RANK_BITS - (value & ((1 << self.RANK_BITS) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            return True
+        return False
+    
+    def merge(self, other):
+        """Register-wise maximum, the sketch of the union of both sets"""
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+    
+    def estimate(self):
+        raw = self.ALPHA * self.REGISTERS ** 2 / sum(map(self.POWERS.__getitem__, self.registers))
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * self.REGISTERS and zeros:
+            # Small-range correction (linear counting)
+            return round(self.REGISTERS * math.log(self.REGISTERS / zeros))
+        return round(raw)
+    
+    def to_bytes(self):
+        return zlib.compress(bytes(self.registers))
+    
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(zlib.decompress(data))
+
+
+class SpaceSaving:
+    """Top-k heavy hitters in bounded memory (Space-Saving by Metwally et al.)
+    
+    At most `capacity` keys are counted. A new key replaces the smallest counter and
+    inherits its count as overestimation error, so frequent keys are never lost.
+    The min-heap holds lazily invalidated (count, key) entries.
+    """
+    
+    def __init__(self, capacity=HEAVY_HITTER_CAPACITY):
+        self.capacity = capacity
+        self.counts = {}  # key -> [count, error]
+        self.heap = []
+    
+    def add(self, key, amount=1):
+        counts = self.counts
+        entry = counts.get(key)
+        if entry is not None:
+            entry[0] += amount
+        elif len(counts) < self.capacity:
+            entry = counts[key] = [amount, 0]
+        else:
+            min_count, victim = self.pop_min()
+            del counts[victim]
+            entry = counts[key] = [min_count + amount, min_count]
+        heapq.heappush(self.heap, (entry[0], key))
+        if len(self.heap) > 4 * self.capacity:
+            self.rebuild_heap()
+    
+    def pop_min(self):
+        while True:
+            count, key = heapq.heappop(self.heap)
+            entry = self.counts.get(key)
+            if entry is not None and entry[0] == count:
+                return count, key
+    
+    def rebuild_heap(self):
+        self.heap = [(entry[0], key) for key, entry in self.counts.items()]
+        heapq.heapify(self.heap)
+    
+    def to_dict(self):
+        return {str(key): entry for key, entry in self.counts.items()}
+    
+    @classmethod
+    def from_dict(cls, data, capacity=HEAVY_HITTER_CAPACITY):
+        summary = cls(capacity)
+        summary.counts = {int(key): list(entry) for key, entry in data.items()}
+        summary.rebuild_heap()
+        return summary
+    
+    @staticmethod
+    def merged_top(summaries, limit):
+        """Top keys over several summaries (e.g. days) by summed count"""
+        totals = defaultdict(int)
+        for summary in summaries:
+            for key, (count, error) in summary.counts.items():
+                totals[key] += count
+        return heapq.nlargest(limit, totals.items(), key=lambda item: item[1])
+
+
+class GuildStats:
+    """All statistics of a single guild"""
+    
+    def __init__(self, guild_id):
+        self.guild_id = guild_id
+        self.series = {metric: RollupSeries() for metric in DAILY_METRICS}
+        self.total_stats = create_empty_totals()
+        self.channels = BoundedCounters(MAX_TRACKED_CHANNELS)
+        self.top_members = {}  # date ordinal -> SpaceSaving of message authors
+        self.member_counts = None  # {"humans": n, "bots": n} once seeded, kept current by events
+        self.active_members = {}  # date ordinal -> HyperLogLog of active member IDs
+        self.archived_until = None  # days before this ordinal only exist in the archive
+        self.loaded_from = None  # earliest archived day read back into memory since the last cleanup
+    
+    def count_member_message(self, ordinal, member_id, amount=1):
+        summary = self.top_members.get(ordinal)
+        if summary is None:
+            summary = self.top_members[ordinal] = SpaceSaving()
+        summary.add(member_id, amount)
+    
+    def get_top_members(self, end, days, limit=TOP_LIST_SIZE):
+        """Most active message authors over the `days` days ending at ordinal `end`"""
+        summaries = [self.top_members[o] for o in range(end - days + 1, end + 1) if o in self.top_members]
+        return SpaceSaving.merged_top(summaries, limit)
+    
+    def count_active_member(self, ordinal, member_id):
+        """Add a member to the day's sketch, returns True if a register changed"""
+        sketch = self.active_members.get(ordinal)
+        if sketch is None:
+            sketch = self.active_members[ordinal] = HyperLogLog()
+        return sketch.add(member_id)
+    
+    def active_member_estimate(self, end, days):
+        """Estimated distinct active members over the `days` days ending at ordinal `end`"""
+        merged = HyperLogLog()
+        for ordinal in range(end - days + 1, end + 1):
+            sketch = self.active_members.get(ordinal)
+            if sketch is not None:
+                merged.merge(sketch)
+        return merged.estimate()
+    
+    def day_stats(self, date_str):
+        """All metrics of a single day"""
+        ordinal = date_to_ordinal(date_str)
+        return {metric: series.days.get(ordinal) for metric, series in self.series.items()}
+    
+    def daily_stats(self, since=None):
+        """Days with activity in the legacy {"YYYY-MM-DD": {metric: value}} format"""
+        daily_stats = {}
+        for metric, series in self.series.items():
+            for ordinal, value in series.days.items():
+                if since is not None and ordinal < since:
+                    continue
+                day = daily_stats.setdefault(ordinal_to_date(ordinal), create_empty_day())
+                day[metric] = value
+        return dict(sorted(daily_stats.items()))
+    
+    def to_dict(self):
+        return {
+            # Archived days read back for a long query are not written to the hot file again
+            "daily_stats": self.daily_stats(since=self.archived_until),
+            "archived_until": ordinal_to_date(self.archived_until) if self.archived_until else None,
+            "total_stats": self.total_stats,
+            "rollups": {metric: series.rollups_to_dict() for metric, series in self.series.items()},
+            "active_members": {
+                ordinal_to_date(ordinal): base64.b64encode(sketch.to_bytes()).decode("ascii")
+                for ordinal, sketch in sorted(self.active_members.items())
+            },
+            "channels": self.channels.to_dict(),
+            "top_members": {
+                ordinal_to_date(ordinal): summary.to_dict()
+                for ordinal, summary in sorted(self.top_members.items())
+            }
+        }
+    
+    @classmethod
+    def from_dict(cls, guild_id, data):
+        guild_stats = cls(guild_id)
+        for date_str, day_stats in data.get("daily_stats", {}).items():
+            ordinal = date_to_ordinal(date_str)
+            for metric, value in day_stats.items():
+                if metric in guild_stats.series and value:
+                    guild_stats.series[metric].days.add(ordinal, value)
+        for metric, rollups in data.get("rollups", {}).items():
+            if metric in guild_stats.series:
+                guild_stats.series[metric].load_rollups(rollups)
+        for date_str, sketch in data.get("active_members", {}).items():
+            guild_stats.active_members[date_to_ordinal(date_str)] = HyperLogLog.from_bytes(base64.b64decode(sketch))
+        guild_stats.total_stats.update(data.get("total_stats", {}))
+        if data.get("archived_until"):
+            guild_stats.archived_until = date_to_ordinal(data["archived_until"])
+        guild_stats.channels = BoundedCounters.from_dict(data.get("channels", {}), MAX_TRACKED_CHANNELS)
+        for date_str, summary in data.get("top_members", {}).items():
+            guild_stats.top_members[date_to_ordinal(date_str)] = SpaceSaving.from_dict(summary)
+        return guild_stats
+
+
+class ExportWriter:
+    """Streams export rows into in-memory parts that each stay below EXPORT_PART_BYTES"""
+    
+    EXTENSIONS = {"JSON": "json", "NDJSON": "ndjson", "CSV": "csv"}
+    
+    def __init__(self, export_format, metrics, meta, compress=False):
+        self.export_format = export_format
+        self.metrics = metrics
+        self.meta = meta
+        self.compress = compress
+        self.parts = []
+        self.buffer = None
+        self.stream = None
+        self.rows_in_part = 0
+    
+    def write(self, text):
+        self.stream.write(text.encode("utf-8"))
+    
+    def open_part(self):
+        self.buffer = io.BytesIO()
+        self.stream = gzip.GzipFile(fileobj=self.buffer, mode="wb", mtime=0) if self.compress else self.buffer
+        self.rows_in_part = 0
+        meta = {**self.meta, "part": len(self.parts) + 1}
+        if self.export_format == "JSON":
+            self.write(json.dumps(meta, ensure_ascii=False)[:-1] + ', "daily_stats": {')
+        elif self.export_format == "NDJSON":
+            self.write(json.dumps(meta, ensure_ascii=False) + "\n")
+        else:
+            self.write(",".join(("date",) + tuple(self.metrics)) + "\n")
+    
+    def close_part(self):
+        if self.export_format == "JSON":
+            self.write("}}")
+        if self.compress:
+            self.stream.close()
+        self.parts.append(self.buffer.getvalue())
+        self.buffer = self.stream = None
+    
+    def write_row(self, date_str, values):
+        if self.stream is None:
+            self.open_part()
+        if self.export_format == "JSON":
+            row = dict(zip(self.metrics, values))
+            self.write(("" if not self.rows_in_part else ", ") + f'"{date_str}": {json.dumps(row)}')
+        elif self.export_format == "NDJSON":
+            self.write(json.dumps({"date": date_str, **dict(zip(self.metrics, values))}) + "\n")
+        else:
+            self.write(",".join([date_str] + [str(value) for value in values]) + "\n")
+        self.rows_in_part += 1
+        # For gzip this is the compressed size so far, which lags slightly behind
+        if self.buffer.tell() >= EXPORT_PART_BYTES:
+            self.close_part()
+    
+    def finish(self, basename):
+        """Close the last part and return [(filename, bytes)]"""
+        if self.stream is None and not self.parts:
+            self.open_part()
+        if self.stream is not None:
+            self.close_part()
+        extension = self.EXTENSIONS[self.export_format] + (".gz" if self.compress else "")
+        if len(self.parts) == 1:
+            return [(f"{basename}.{extension}", self.parts[0])]
+        return [(f"{basename}_part{index}.{extension}", part) for index, part in enumerate(self.parts, 1)]
+
+
+def group_export_parts(parts):
+    """Split [(filename, bytes)] into messages that each stay within the upload limit"""
+    messages = []
+    size = 0
+    for filename, data in parts:
+        if not messages or len(messages[-1]) >= EXPORT_FILES_PER_MESSAGE or size + len(data) > EXPORT_MESSAGE_BYTES:
+            messages.append([])
+            size = 0
+        messages[-1].append((filename, data))
+        size += len(data)
+    return messages
+
+
+def build_export(export_format, metrics, meta, rows, compress, basename):
+    """Serialize export rows (runs in a worker thread)"""
+    writer = ExportWriter(export_format, metrics, meta, compress)
+    for date_str, values in rows:
+        writer.write_row(date_str, values)
+    return writer.finish(basename)
+
+
+def create_pending():
+    """Buffers for increments that have not been persisted yet"""
+    return {
+        "daily": defaultdict(int),       # (guild_id, date, metric) -> amount
+        "totals": defaultdict(int),      # (guild_id, metric) -> amount
+        "rollups": defaultdict(int),     # (guild_id, metric) -> increments since last write
+        "sketches": defaultdict(int),    # (guild_id, date ordinal) -> register updates since last write
+        "heavy_hitters": defaultdict(int),  # (guild_id, date ordinal) -> updates since last write
+        "dimensions": defaultdict(int)   # (guild_id, dimension, key, date, metric) -> amount
+    }
+
+
+class JSONStatsBackend:
+    """Keeps the hot statistics of all guilds in a single JSON file, older days in a gzip archive"""
+    
+    def __init__(self, path, archive_path=STATS_ARCHIVE_FILE):
+        self.path = path
+        self.archive_path = archive_path
+    
+    def load(self, since_date):
+        """Load the whole file; it only holds days that have not been archived yet"""
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if "daily_stats" in data:
+            # Pre-guild format: one global structure
+            data = {"guilds": {str(STATS_HOME_GUILD_ID): data}}
+        return {
+            int(guild_id): GuildStats.from_dict(int(guild_id), guild_data)
+            for guild_id, guild_data in data.get("guilds", {}).items()
+        }
+    
+    def serialize(self, guilds):
+        data = {"guilds": {str(guild_id): guild_stats.to_dict() for guild_id, guild_stats in guilds.items()}}
+        return json.dumps(data, indent=2, ensure_ascii=False)
+    
+    async def write(self, guilds, pending):
+        # Serialize on the loop so the snapshot is consistent, write in a thread
+        payload = self.serialize(guilds)
+        await asyncio.to_thread(write_file_atomic, self.path, payload)
+    
+    def write_sync(self, guilds, pending):
+        write_file_atomic(self.path, self.serialize(guilds))
+    
+    async def archive(self, guilds, cutoff):
+        """Append days before ordinal `cutoff` that are not archived yet as monthly blocks
+        
+        Returns the number of archived days. The caller trims them from memory afterwards.
+        """
+        lines = []
+        archived = 0
+        for guild_id, guild_stats in guilds.items():
+            days = {}
+            for metric, series in guild_stats.series.items():
+                for ordinal, value in series.days.items():
+                    if ordinal < cutoff and (guild_stats.archived_until is None or ordinal >= guild_stats.archived_until):
+                        days.setdefault(ordinal_to_date(ordinal), {})[metric] = value
+            archived += len(days)
+            for month, month_days in group_by_month(days).items():
+                lines.append(json.dumps({"guild_id": guild_id, "month": month, "days": month_days}))
+        if lines:
+            await asyncio.to_thread(append_archive, self.archive_path, lines)
+        return archived
+    
+    async def merge_archived(self, guild_id, metric, amounts):
+        """Add {"YYYY-MM-DD": amount} to archived days by appending blocks with the new values"""
+        await asyncio.to_thread(self.merge_archived_sync, guild_id, metric, amounts)
+    
+    def merge_archived_sync(self, guild_id, metric, amounts):
+        existing = read_archive(self.archive_path, guild_id, min(amounts), max(amounts))
+        days = {
+            date_str: {metric: existing.get(date_str, {}).get(metric, 0) + amount}
+            for date_str, amount in amounts.items()
+        }
+        append_archive(self.archive_path, [
+            json.dumps({"guild_id": guild_id, "month": month, "days": month_days})
+            for month, month_days in group_by_month(days).items()
+        ])
+    
+    async def query_range(self, guild_id, start_date, end_date):
+        """Archived days of one guild; the hot days are already in memory"""
+        return await asyncio.to_thread(read_archive, self.archive_path, guild_id, start_date, end_date)
+    
+    async def reset(self, guild_id):
+        await asyncio.to_thread(remove_from_archive, self.archive_path, guild_id)
+    
+    async def close(self):
+        pass
+
+
+class SQLiteStatsBackend:
+    """Stores daily counters as (guild_id, bucket_start, metric) rows in an aiosqlite database"""
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS stats (
+            guild_id INTEGER NOT NULL,
+            bucket_start INTEGER NOT NULL,
+            metric TEXT NOT NULL,
+            value INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, bucket_start, metric)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_stats_metric ON stats (guild_id, metric, bucket_start);
+        CREATE TABLE IF NOT EXISTS dimension_stats (
+            guild_id INTEGER NOT NULL,
+            dimension TEXT NOT NULL,
+            key_id INTEGER NOT NULL,
+            bucket_start INTEGER NOT NULL,
+            metric TEXT NOT NULL,
+            value INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, dimension, key_id, bucket_start, metric)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_dimension_stats_bucket ON dimension_stats (guild_id, bucket_start);
+        CREATE TABLE IF NOT EXISTS rollups (
+            guild_id INTEGER NOT NULL,
+            metric TEXT NOT NULL,
+            minute_head INTEGER,
+            minutes BLOB NOT NULL,
+            hour_head INTEGER,
+            hours BLOB NOT NULL,
+            PRIMARY KEY (guild_id, metric)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS sketches (
+            guild_id INTEGER NOT NULL,
+            bucket_start INTEGER NOT NULL,
+            registers BLOB NOT NULL,
+            PRIMARY KEY (guild_id, bucket_start)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS heavy_hitters (
+            guild_id INTEGER NOT NULL,
+            bucket_start INTEGER NOT NULL,
+            summary TEXT NOT NULL,
+            PRIMARY KEY (guild_id, bucket_start)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS archive (
+            guild_id INTEGER NOT NULL,
+            month_start INTEGER NOT NULL,
+            days BLOB NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_archive_month ON archive (guild_id, month_start);
+        CREATE TABLE IF NOT EXISTS totals (
+            guild_id INTEGER NOT NULL,
+            metric TEXT NOT NULL,
+            value INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, metric)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+    UPSERT_DAILY = (
+        "INSERT INTO stats (guild_id, bucket_start, metric, value) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (guild_id, bucket_start, metric) DO UPDATE SET value = value + excluded.value"
+    )
+    UPSERT_DIMENSION = (
+        "INSERT INTO dimension_stats (guild_id, dimension, key_id, bucket_start, metric, value) "
+        "VALUES (?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (guild_id, dimension, key_id, bucket_start, metric) "
+        "DO UPDATE SET value = value + excluded.value"
+    )
+    UPSERT_TOTAL = (
+        "INSERT INTO totals (guild_id, metric, value) VALUES (?, ?, ?) "
+        "ON CONFLICT (guild_id, metric) DO UPDATE SET value = value + excluded.value"
+    )
+    REPLACE_ROLLUP = (
+        "INSERT OR REPLACE INTO rollups (guild_id, metric, minute_head, minutes, hour_head, hours) "
+        "VALUES (?, ?, ?, ?, ?, ?)"
+    )
+    REPLACE_SKETCH = "INSERT OR REPLACE INTO sketches (guild_id, bucket_start, registers) VALUES (?, ?, ?)"
+    REPLACE_HEAVY_HITTERS = "INSERT OR REPLACE INTO heavy_hitters (guild_id, bucket_start, summary) VALUES (?, ?, ?)"
+    INSERT_ARCHIVE = "INSERT INTO archive (guild_id, month_start, days) VALUES (?, ?, ?)"
+    
+    def __init__(self, path, json_path=None, archive_path=None):
+        self.path = path
+        self.json_path = json_path
+        self.archive_path = archive_path
+        self.db = None
+    
+    def connect_sync(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(self.SCHEMA)
+        return conn
+    
+    async def connect(self):
+        if self.db is None:
+            self.db = await aiosqlite.connect(self.path)
+            await self.db.execute("PRAGMA journal_mode=WAL")
+            await self.db.execute("PRAGMA synchronous=NORMAL")
+        return self.db
+    
+    def load(self, since_date):
+        """Load totals and the hot window of daily rows (runs once at startup)
+        
+        Older days stay on disk (in the stats table until they are archived) and are
+        read through query_range when a query reaches past the hot window.
+        """
+        conn = self.connect_sync()
+        try:
+            if self.json_path and os.path.exists(self.json_path):
+                self.import_json(conn, self.json_path)
+            
+            guilds = {}
+            
+            def get_guild(guild_id):
+                if guild_id not in guilds:
+                    guilds[guild_id] = GuildStats(guild_id)
+                return guilds[guild_id]
+            
+            for guild_id, metric, value in conn.execute("SELECT guild_id, metric, value FROM totals"):
+                get_guild(guild_id).total_stats[metric] = value
+            
+            since_bucket = date_to_bucket(since_date)
+            for guild_id, bucket_start, metric, value in conn.execute(
+                "SELECT guild_id, bucket_start, metric, value FROM stats WHERE bucket_start >= ?",
+                (since_bucket,)
+            ):
+                series = get_guild(guild_id).series.get(metric)
+                if series is not None:
+                    series.days.add(date_to_ordinal(bucket_to_date(bucket_start)), value)
+            
+            for guild_id, metric, minute_head, minutes, hour_head, hours in conn.execute(
+                "SELECT guild_id, metric, minute_head, minutes, hour_head, hours FROM rollups"
+            ):
+                series = get_guild(guild_id).series.get(metric)
+                if series is not None:
+                    series.minutes.values = array('i', zlib.decompress(minutes))
+                    series.minutes.head = minute_head
+                    series.hours.values = array('i', zlib.decompress(hours))
+                    series.hours.head = hour_head
+            
+            sketch_since = date_to_bucket(ordinal_to_date(datetime.now().toordinal() - HLL_RETENTION_DAYS))
+            for guild_id, bucket_start, registers in conn.execute(
+                "SELECT guild_id, bucket_start, registers FROM sketches WHERE bucket_start >= ?",
+                (sketch_since,)
+            ):
+                ordinal = date_to_ordinal(bucket_to_date(bucket_start))
+                get_guild(guild_id).active_members[ordinal] = HyperLogLog.from_bytes(registers)
+            
+            heavy_hitter_since = date_to_bucket(ordinal_to_date(datetime.now().toordinal() - HEAVY_HITTER_DAYS))
+            for guild_id, bucket_start, summary in conn.execute(
+                "SELECT guild_id, bucket_start, summary FROM heavy_hitters WHERE bucket_start >= ?",
+                (heavy_hitter_since,)
+            ):
+                ordinal = date_to_ordinal(bucket_to_date(bucket_start))
+                get_guild(guild_id).top_members[ordinal] = SpaceSaving.from_dict(json.loads(summary))
+            
+            # Oldest first so the most recently active keys survive the bound
+            for guild_id, key_id, bucket_start, metric, value in conn.execute(
+                "SELECT guild_id, key_id, bucket_start, metric, value FROM dimension_stats "
+                "WHERE dimension = 'channel' AND bucket_start >= ? ORDER BY bucket_start",
+                (since_bucket,)
+            ):
+                get_guild(guild_id).channels.add(key_id, bucket_to_date(bucket_start), metric, value)
+            
+            for (guild_id,) in conn.execute(
+                "SELECT DISTINCT guild_id FROM stats WHERE bucket_start < ? UNION SELECT DISTINCT guild_id FROM archive",
+                (since_bucket,)
+            ):
+                get_guild(guild_id)
+            history_start = date_to_ordinal(since_date)
+            for guild_stats in guilds.values():
+                guild_stats.archived_until = history_start
+            return guilds
+        finally:
+            conn.close()
+    
+    def import_json(self, conn, json_path):
+        """One-shot import of an existing server_stats.json into the database"""
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'json_imported'").fetchone():
+            return
+        
+        pending = create_pending()
+        guilds = JSONStatsBackend(json_path).load(None)
+        for guild_id, guild_stats in guilds.items():
+            for metric, series in guild_stats.series.items():
+                for ordinal, value in series.days.items():
+                    pending["daily"][(guild_id, ordinal_to_date(ordinal), metric)] += value
+                pending["rollups"][(guild_id, metric)] += 1
+            for ordinal in guild_stats.active_members:
+                pending["sketches"][(guild_id, ordinal)] += 1
+            for ordinal in guild_stats.top_members:
+                pending["heavy_hitters"][(guild_id, ordinal)] += 1
+            for metric, value in guild_stats.total_stats.items():
+                pending["totals"][(guild_id, metric)] += value
+            for key, days in guild_stats.channels.counters.items():
+                for date_str, day_stats in days.items():
+                    for metric, value in day_stats.items():
+                        pending["dimensions"][(guild_id, "channel", key, date_str, metric)] += value
+        
+        archive_rows = [
+            (
+                record["guild_id"],
+                date_to_bucket(f"{record['month']}-01"),
+                zlib.compress(json.dumps(record["days"]).encode("utf-8"))
+            )
+            for record in iter_archive(self.archive_path or "")
+        ]
+        
+        with conn:
+            self.apply_sync(conn, guilds, pending)
+            conn.executemany(self.INSERT_ARCHIVE, archive_rows)
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('json_imported', ?)",
+                (datetime.now().isoformat(),)
+            )
+        print(f"Imported {len(pending['daily'])} daily statistic rows from {json_path}")
+    
+    def pending_statements(self, guilds, pending):
+        """(sql, rows) batches that persist the pending deltas"""
+        daily_rows = [
+            (guild_id, date_to_bucket(date_str), metric, amount)
+            for (guild_id, date_str, metric), amount in pending["daily"].items()
+            if amount
+        ]
+        dimension_rows = [
+            (guild_id, dimension, key, date_to_bucket(date_str), metric, amount)
+            for (guild_id, dimension, key, date_str, metric), amount in pending["dimensions"].items()
+            if amount
+        ]
+        total_rows = [
+            (guild_id, metric, amount)
+            for (guild_id, metric), amount in pending["totals"].items()
+            if amount
+        ]
+        # Ring buffers are small and compress well, so touched ones are rewritten whole
+        rollup_rows = []
+        for guild_id, metric in pending["rollups"]:
+            series = guilds[guild_id].series[metric]
+            rollup_rows.append((
+                guild_id,
+                metric,
+                series.minutes.head,
+                zlib.compress(series.minutes.values.tobytes()),
+                series.hours.head,
+                zlib.compress(series.hours.values.tobytes())
+            ))
+        sketch_rows = [
+            (guild_id, date_to_bucket(ordinal_to_date(ordinal)), guilds[guild_id].active_members[ordinal].to_bytes())
+            for guild_id, ordinal in pending["sketches"]
+            if ordinal in guilds[guild_id].active_members
+        ]
+        heavy_hitter_rows = [
+            (guild_id, date_to_bucket(ordinal_to_date(ordinal)), json.dumps(guilds[guild_id].top_members[ordinal].to_dict()))
+            for guild_id, ordinal in pending["heavy_hitters"]
+            if ordinal in guilds[guild_id].top_members
+        ]
+        return [
+            (self.UPSERT_DAILY, daily_rows),
+            (self.UPSERT_DIMENSION, dimension_rows),
+            (self.UPSERT_TOTAL, total_rows),
+            (self.REPLACE_ROLLUP, rollup_rows),
+            (self.REPLACE_SKETCH, sketch_rows),
+            (self.REPLACE_HEAVY_HITTERS, heavy_hitter_rows)
+        ]
+    
+    def apply_sync(self, conn, guilds, pending):
+        for sql, rows in self.pending_statements(guilds, pending):
+            if rows:
+                conn.executemany(sql, rows)
+    
+    async def write(self, guilds, pending):
+        """Apply the pending deltas as one batched upsert transaction"""
+        statements = [(sql, rows) for sql, rows in self.pending_statements(guilds, pending) if rows]
+        if not statements:
+            return
+        db = await self.connect()
+        for sql, rows in statements:
+            await db.executemany(sql, rows)
+        await db.commit()
+    
+    def write_sync(self, guilds, pending):
+        conn = self.connect_sync()
+        try:
+            with conn:
+                self.apply_sync(conn, guilds, pending)
+        finally:
+            conn.close()
+    
+    async def archive(self, guilds, cutoff):
+        """Move day rows before ordinal `cutoff` out of the stats table into compressed monthly blocks
+        
+        Channel, sketch and heavy-hitter rows are only ever read inside their retention
+        windows, so expired ones are deleted in the same transaction.
+        """
+        db = await self.connect()
+        cutoff_bucket = date_to_bucket(ordinal_to_date(cutoff))
+        blocks = defaultdict(dict)
+        async with db.execute(
+            "SELECT guild_id, bucket_start, metric, value FROM stats WHERE bucket_start < ?",
+            (cutoff_bucket,)
+        ) as cursor:
+            async for guild_id, bucket_start, metric, value in cursor:
+                date_str = bucket_to_date(bucket_start)
+                blocks[(guild_id, date_str[:7])].setdefault(date_str, {})[metric] = value
+        
+        # Rows added by a backfill can belong to days that are archived already
+        for (guild_id, month), days in blocks.items():
+            existing = {}
+            async with db.execute(
+                "SELECT days FROM archive WHERE guild_id = ? AND month_start = ? ORDER BY rowid",
+                (guild_id, date_to_bucket(f"{month}-01"))
+            ) as cursor:
+                async for (archived_days,) in cursor:
+                    merge_archive_days(existing, json.loads(zlib.decompress(archived_days)), min(days), max(days))
+            for date_str, values in days.items():
+                for metric in values:
+                    values[metric] += existing.get(date_str, {}).get(metric, 0)
+        
+        today = datetime.now().toordinal()
+        expired = (
+            ("stats", cutoff_bucket),
+            ("dimension_stats", cutoff_bucket),
+            ("sketches", date_to_bucket(ordinal_to_date(today - HLL_RETENTION_DAYS))),
+            ("heavy_hitters", date_to_bucket(ordinal_to_date(today - HEAVY_HITTER_DAYS)))
+        )
+        archive_rows = [
+            (guild_id, date_to_bucket(f"{month}-01"), zlib.compress(json.dumps(days).encode("utf-8")))
+            for (guild_id, month), days in blocks.items()
+        ]
+        await db.executemany(self.INSERT_ARCHIVE, archive_rows)
+        for table, before in expired:
+            await db.execute(f"DELETE FROM {table} WHERE bucket_start < ?", (before,))
+        await db.commit()
+        return sum(len(days) for days in blocks.values())
+    
+    async def merge_archived(self, guild_id, metric, amounts):
+        """Add {"YYYY-MM-DD": amount} to days before the hot window
+        
+        The deltas go into the stats table; query_range adds them to the archived values
+        and the next compaction folds them into a new archive block.
+        """
+        db = await self.connect()
+        await db.executemany(self.UPSERT_DAILY, [
+            (guild_id, date_to_bucket(date_str), metric, amount) for date_str, amount in amounts.items()
+        ])
+        await db.commit()
+    
+    async def query_range(self, guild_id, start_date, end_date):
+        """Indexed range query returning {"YYYY-MM-DD": {metric: value}} for start..end inclusive
+        
+        Reads the overlapping archive blocks first, then adds the rows still in the stats table.
+        """
+        db = await self.connect()
+        result = {}
+        async with db.execute(
+            "SELECT days FROM archive WHERE guild_id = ? AND month_start BETWEEN ? AND ? ORDER BY rowid",
+            (guild_id, date_to_bucket(f"{start_date[:7]}-01"), date_to_bucket(end_date))
+        ) as cursor:
+            async for (days,) in cursor:
+                merge_archive_days(result, json.loads(zlib.decompress(days)), start_date, end_date)
+        async with db.execute(
+            "SELECT bucket_start, metric, value FROM stats "
+            "WHERE guild_id = ? AND bucket_start BETWEEN ? AND ?",
+            (guild_id, date_to_bucket(start_date), date_to_bucket(end_date))
+        ) as cursor:
+            async for bucket_start, metric, value in cursor:
+                day = result.setdefault(bucket_to_date(bucket_start), create_empty_day())
+                day[metric] = day.get(metric, 0) + value
+        return result
+    
+    async def reset(self, guild_id):
+        db = await self.connect()
+        for table in ("stats", "dimension_stats", "rollups", "sketches", "heavy_hitters", "archive", "totals"):
+            await db.execute(f"DELETE FROM {table} WHERE guild_id = ?", (guild_id,))
+        await db.commit()
+    
+    async def close(self):
+        if self.db is not None:
+            await self.db.close()
+            self.db = None
+
+
+def create_stats_backend():
+    if STATS_BACKEND == "sqlite":
+        return SQLiteStatsBackend(STATS_DB_FILE, json_path=STATS_JSON_FILE, archive_path=STATS_ARCHIVE_FILE)
+    return JSONStatsBackend(STATS_JSON_FILE, STATS_ARCHIVE_FILE)
+
 
 class ServerStats(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.stats_file = "data/server_stats.json"
-        self.stats_data = self.load_stats()
+        self.backend = create_stats_backend()
+        self.guilds = self.load_stats()
+        self.pending = create_pending()
+        self.pending_increments = 0
+        self.dirty = False
+        self.flush_scheduled = False
+        self.flush_tasks = set()  # threshold flushes in flight, referenced until they finish
+        self.closed = False
+        self.flush_lock = asyncio.Lock()
+        self.history_lock = asyncio.Lock()
+        self.response_cache = SimpleMemoryCache(namespace="stats", plugins=[HitMissRatioPlugin()])
+        self.response_versions = defaultdict(int)
+        self.backfill_checkpoints = self.load_backfill_checkpoints()
+        self.backfill_lock = asyncio.Lock()
+        self.backfill_tasks = {}
         self.cleanup_old_stats.start()
+        self.periodic_flush.start()
+        self.reconcile_member_counts.start()
     
     def load_stats(self):
-        """Load statistics from JSON file"""
+        """Load the hot statistics of all guilds from the storage backend"""
         try:
-            if os.path.exists(self.stats_file):
-                with open(self.stats_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            else:
-                return self.create_empty_stats()
+            since = ordinal_to_date(datetime.now().toordinal() - STATS_HOT_DAYS)
+            return self.backend.load(since)
         except Exception as e:
             print(f"Error loading statistics: {e}")
-            return self.create_empty_stats()
+            return {}
     
-    def create_empty_stats(self):
-        """Create empty statistics structure"""
-        return {
-            "daily_stats": {},  # Format: "YYYY-MM-DD": {"new_members": 0, "left_members": 0, ...}
-            "total_stats": {
-                "total_members": 0,
-                "total_messages": 0,
-                "total_joins": 0,
-                "total_leaves": 0
-            }
-        }
+    def get_guild_stats(self, guild_id):
+        """Get (or lazily create) the statistics of one guild"""
+        guild_stats = self.guilds.get(guild_id)
+        if guild_stats is None:
+            guild_stats = self.guilds[guild_id] = GuildStats(guild_id)
+        return guild_stats
+    
+    def take_pending(self):
+        """Swap out the pending deltas so new increments go into fresh buffers"""
+        pending = self.pending
+        self.pending = create_pending()
+        return pending
+    
+    def restore_pending(self, pending):
+        """Put deltas back after a failed write so they are retried on the next flush"""
+        for name, deltas in pending.items():
+            for key, amount in deltas.items():
+                self.pending[name][key] += amount
     
     def save_stats(self):
-        """Save statistics to JSON file"""
+        """Synchronously save statistics (used on unload when no event loop is running)"""
+        if not self.dirty:
+            return
+        pending = self.take_pending()
         try:
-            with open(self.stats_file, 'w', encoding='utf-8') as f:
-                json.dump(self.stats_data, f, indent=2, ensure_ascii=False)
+            self.backend.write_sync(self.guilds, pending)
+            self.dirty = False
+            self.pending_increments = 0
         except Exception as e:
+            self.restore_pending(pending)
             print(f"Error saving statistics: {e}")
     
+    def mark_dirty(self):
+        """Mark in-memory statistics as changed without counting an increment"""
+        self.dirty = True
+    
+    async def flush_stats(self):
+        """Persist dirty statistics off the event loop"""
+        async with self.flush_lock:
+            self.flush_scheduled = False
+            if not self.dirty:
+                return
+            
+            coalesced = self.pending_increments
+            self.pending_increments = 0
+            self.dirty = False
+            pending = self.take_pending()
+            try:
+                await self.backend.write(self.guilds, pending)
+                print(f"Statistics flushed ({coalesced} increments coalesced)")
+                # Responses are invalidated per flush, not per increment: every
+                # command bumps "commands_used" right before it runs
+                for guild_id in {key[0] for buffer in pending.values() for key in buffer}:
+                    self.invalidate_responses(guild_id)
+            except Exception as e:
+                self.restore_pending(pending)
+                self.pending_increments += coalesced
+                self.dirty = True
+                print(f"Error saving statistics: {e}")
+    
+    @tasks.loop(seconds=STATS_FLUSH_INTERVAL)
+    async def periodic_flush(self):
+        """Flush pending statistics on a fixed interval"""
+        await self.flush_stats()
+    
+    def invalidate_responses(self, guild_id):
+        """Counters of a guild changed, cached responses of it must not be served anymore"""
+        self.response_versions[guild_id] += 1
+    
+    async def get_cached_response(self, guild_id, command, build, *args):
+        """Field values of a command response from the cache, built (and cached) on a miss"""
+        key = f"{guild_id}:{command}:{self.response_versions[guild_id]}:{datetime.now().toordinal()}"
+        fields = await self.response_cache.get(key)
+        if fields is None:
+            fields = await build(*args)
+            await self.response_cache.set(key, fields, ttl=RESPONSE_CACHE_TTL)
+        return fields
+    
     def get_today_string(self):
         """Get today's date as string"""
         return datetime.now().strftime("%Y-%m-%d")
@@ -53,29 +1303,38 @@ class ServerStats(commands.Cog):
         """Convert date to string"""
         return date.strftime("%Y-%m-%d")
     
-    def ensure_today_stats(self):
-        """Ensure today's statistics exist"""
-        today = self.get_today_string()
-        if today not in self.stats_data["daily_stats"]:
-            self.stats_data["daily_stats"][today] = {
-                "new_members": 0,
-                "left_members": 0,
-                "messages": 0,
-                "voice_joins": 0,
-                "reactions_added": 0,
-                "commands_used": 0,
-                "channels_created": 0,
-                "roles_created": 0
-            }
+    def get_window_dates(self, days):
+        """Date strings of the last `days` days, oldest first"""
+        now = datetime.now()
+        return [self.get_date_string(now - timedelta(days=i)) for i in range(days - 1, -1, -1)]
     
-    def add_stat(self, stat_type, amount=1):
-        """Add statistic"""
-        self.ensure_today_stats()
-        today = self.get_today_string()
+    def add_stat(self, guild_id, stat_type, amount=1, channel_id=None, member_id=None):
+        """Add statistic for a guild, optionally attributed to a channel and/or member"""
+        guild_stats = self.get_guild_stats(guild_id)
+        now = datetime.now()
+        today = self.get_date_string(now)
+        
+        # Minute/hour/day rollups
+        series = guild_stats.series.get(stat_type)
+        if series is not None:
+            series.add(now, amount)
+            self.pending["daily"][(guild_id, today, stat_type)] += amount
+            self.pending["rollups"][(guild_id, stat_type)] += 1
         
-        # Daily statistic
-        if stat_type in self.stats_data["daily_stats"][today]:
-            self.stats_data["daily_stats"][today][stat_type] += amount
+        # Channel dimension
+        if channel_id is not None:
+            guild_stats.channels.add(channel_id, today, stat_type, amount)
+            self.pending["dimensions"][(guild_id, "channel", channel_id, today, stat_type)] += amount
+        
+        if member_id is not None:
+            # Most active message authors
+            if stat_type == "messages":
+                guild_stats.count_member_message(now.toordinal(), member_id, amount)
+                self.pending["heavy_hitters"][(guild_id, now.toordinal())] += 1
+            
+            # Distinct active members
+            if stat_type in ACTIVE_MEMBER_METRICS and guild_stats.count_active_member(now.toordinal(), member_id):
+                self.pending["sketches"][(guild_id, now.toordinal())] += 1
         
         # Total statistic
         total_key = f"total_{stat_type}"
@@ -84,227 +1343,615 @@ class ServerStats(commands.Cog):
         elif stat_type == "left_members":
             total_key = "total_leaves"
         
-        if total_key in self.stats_data["total_stats"]:
-            self.stats_data["total_stats"][total_key] += amount
-        
-        self.save_stats()
-    
-    def get_7_day_stats(self):
-        """Get 7-day statistics"""
-        stats_7_days = {
-            "new_members": 0,
-            "left_members": 0,
-            "messages": 0,
-            "voice_joins": 0,
-            "reactions_added": 0,
-            "commands_used": 0,
-            "channels_created": 0,
-            "roles_created": 0
-        }
+        if total_key in guild_stats.total_stats:
+            guild_stats.total_stats[total_key] += amount
+            self.pending["totals"][(guild_id, total_key)] += amount
         
-        # Calculate last 7 days
-        for i in range(7):
-            date = datetime.now() - timedelta(days=i)
-            date_str = self.get_date_string(date)
-            
-            if date_str in self.stats_data["daily_stats"]:
-                day_stats = self.stats_data["daily_stats"][date_str]
-                for key in stats_7_days:
-                    stats_7_days[key] += day_stats.get(key, 0)
-        
-        return stats_7_days
-    
-    def get_daily_breakdown(self):
-        """Get daily breakdown for last 7 days"""
-        daily_breakdown = []
-        
-        for i in range(6, -1, -1):  # Start from 6 days ago to today
-            date = datetime.now() - timedelta(days=i)
-            date_str = self.get_date_string(date)
-            day_name = date.strftime("%a")  # Mon, Tue, etc.
-            
-            if date_str in self.stats_data["daily_stats"]:
-                day_stats = self.stats_data["daily_stats"][date_str]
-                daily_breakdown.append({
-                    "date": date_str,
-                    "day": day_name,
-                    "stats": day_stats
-                })
+        self.dirty = True
+        self.pending_increments += 1
+        if self.pending_increments >= STATS_FLUSH_THRESHOLD and not self.flush_scheduled:
+            self.flush_scheduled = True
+            task = asyncio.get_running_loop().create_task(self.flush_stats())
+            self.flush_tasks.add(task)
+            task.add_done_callback(self.flush_tasks.discard)
+    
+    async def ensure_history(self, guild_id, days):
+        """Read archived days back into memory when a query reaches past the hot window"""
+        guild_stats = self.get_guild_stats(guild_id)
+        start = datetime.now().toordinal() - days + 1
+        async with self.history_lock:
+            loaded = guild_stats.loaded_from or guild_stats.archived_until
+            if loaded is None or start >= loaded:
+                return
+            older = await self.backend.query_range(guild_id, ordinal_to_date(start), ordinal_to_date(loaded - 1))
+            for date_str, day in older.items():
+                ordinal = date_to_ordinal(date_str)
+                for metric, value in day.items():
+                    if value and metric in guild_stats.series:
+                        guild_stats.series[metric].days.add(ordinal, value)
+            guild_stats.loaded_from = start
+    
+    def get_range_stats(self, guild_id, days=7):
+        """Totals of every metric over the last `days` days, two prefix lookups per metric"""
+        series = self.get_guild_stats(guild_id).series
+        end = datetime.now().toordinal()
+        start = end - days + 1
+        return {metric: series[metric].days.range_sum(start, end) for metric in DAILY_METRICS}
+    
+    def get_breakdown_buckets(self, days, granularity):
+        """(label, start, end) day-ordinal buckets covering the last `days` days, oldest first
+        
+        Returns the buckets and whether older buckets were cut off by MAX_BREAKDOWN_ROWS.
+        """
+        today = datetime.now().toordinal()
+        first = today - days + 1
+        buckets = []
+        end = today
+        while end >= first and len(buckets) < MAX_BREAKDOWN_ROWS:
+            day = datetime.fromordinal(end)
+            if granularity == "Week":
+                start = max(end - day.weekday(), first)
+                label = f"{datetime.fromordinal(start).strftime('%m-%d')} → {day.strftime('%m-%d')}"
+            elif granularity == "Month":
+                start = max(day.replace(day=1).toordinal(), first)
+                label = day.strftime("%b %Y")
             else:
-                daily_breakdown.append({
-                    "date": date_str,
-                    "day": day_name,
-                    "stats": {
-                        "new_members": 0,
-                        "left_members": 0,
-                        "messages": 0,
-                        "voice_joins": 0,
-                        "reactions_added": 0,
-                        "commands_used": 0
-                    }
+                start = end
+                label = day.strftime("%a %m-%d")
+            buckets.append((label, start, end))
+            end = start - 1
+        buckets.reverse()
+        return buckets, end >= first
+    
+    def get_breakdown(self, guild_id, days=7, granularity="Day"):
+        """Breakdown of the last `days` days (newest MAX_BREAKDOWN_ROWS buckets) and whether it was cut off"""
+        series = self.get_guild_stats(guild_id).series
+        metrics = ("new_members", "left_members", "messages")
+        breakdown = []
+        
+        if granularity == "Hour":
+            end = hour_index(datetime.now())
+            count = min(days * 24, MAX_BREAKDOWN_ROWS)
+            windows = {metric: series[metric].hours.window(end, count) for metric in metrics}
+            for offset in range(count):
+                hour = (end - count + 1 + offset) % 24
+                breakdown.append({
+                    "label": f"{hour:02d}:00",
+                    "stats": {metric: windows[metric][offset] for metric in metrics}
                 })
+            return breakdown, days * 24 > count
         
-        return daily_breakdown
+        buckets, truncated = self.get_breakdown_buckets(days, granularity)
+        for label, start, end in buckets:
+            breakdown.append({
+                "label": label,
+                "stats": {metric: series[metric].days.range_sum(start, end) for metric in metrics}
+            })
+        return breakdown, truncated
+    
+    def get_channel_breakdown(self, guild_id, days=7, metric="messages", limit=TOP_LIST_SIZE):
+        """Top channels for a metric, aggregated from the channel dimension"""
+        days = min(days, STATS_HOT_DAYS)
+        totals = self.get_guild_stats(guild_id).channels.totals(self.get_window_dates(days), metric)
+        return heapq.nlargest(limit, totals.items(), key=lambda item: item[1])
+    
+    def get_recent_minutes(self, guild_id, metric="messages", minutes=60):
+        """Per-minute values for the last `minutes` minutes, oldest first"""
+        series = self.get_guild_stats(guild_id).series[metric]
+        return series.minutes.window(minute_index(datetime.now()), minutes)
+    
+    def get_peak_hours(self, guild_id, metric="messages", days=90, limit=3):
+        """Busiest hours of the day over the last `days` days"""
+        series = self.get_guild_stats(guild_id).series[metric]
+        end = hour_index(datetime.now())
+        by_hour = [0] * 24
+        for index in range(end - days * 24 + 1, end + 1):
+            by_hour[index % 24] += series.hours.get(index)
+        ranked = sorted(enumerate(by_hour), key=lambda item: item[1], reverse=True)
+        return [(hour, count) for hour, count in ranked[:limit] if count]
     
     @tasks.loop(hours=24)
     async def cleanup_old_stats(self):
-        """Clean up statistics older than 30 days"""
-        cutoff_date = datetime.now() - timedelta(days=30)
-        cutoff_str = self.get_date_string(cutoff_date)
-        
-        dates_to_remove = []
-        for date_str in self.stats_data["daily_stats"]:
-            if date_str < cutoff_str:
-                dates_to_remove.append(date_str)
-        
-        for date_str in dates_to_remove:
-            del self.stats_data["daily_stats"][date_str]
-        
-        if dates_to_remove:
-            self.save_stats()
-            print(f"Cleaned up {len(dates_to_remove)} old statistic entries")
+        """Archive days older than the hot window and drop expired channel/member/sketch data"""
+        try:
+            cutoff = datetime.now().toordinal() - STATS_HOT_DAYS
+            cutoff_str = ordinal_to_date(cutoff)
+            
+            # Days before the cutoff move to the archive and leave memory (and the hot file)
+            async with self.history_lock:
+                async with self.flush_lock:
+                    archived = await self.backend.archive(self.guilds, cutoff)
+                    for guild_stats in self.guilds.values():
+                        for series in guild_stats.series.values():
+                            series.days.trim_before(cutoff)
+                        guild_stats.archived_until = cutoff
+                        guild_stats.loaded_from = None
+            
+            removed = 0
+            for guild_stats in self.guilds.values():
+                removed += guild_stats.channels.prune(cutoff_str)
+                heavy_hitter_cutoff = datetime.now().toordinal() - HEAVY_HITTER_DAYS
+                for ordinal in [ordinal for ordinal in guild_stats.top_members if ordinal < heavy_hitter_cutoff]:
+                    del guild_stats.top_members[ordinal]
+                    removed += 1
+                sketch_cutoff = datetime.now().toordinal() - HLL_RETENTION_DAYS
+                for ordinal in [ordinal for ordinal in guild_stats.active_members if ordinal < sketch_cutoff]:
+                    del guild_stats.active_members[ordinal]
+                    removed += 1
+            
+            if archived or removed:
+                self.mark_dirty()
+                await self.flush_stats()
+                print(f"Archived {archived} days and cleaned up {removed} old statistic entries")
+                
+        except Exception as e:
+            print(f"Error during cleanup: {e}")
     
     @cleanup_old_stats.before_loop
     async def before_cleanup(self):
         await self.bot.wait_until_ready()
     
+    def count_members(self, guild):
+        """Count humans and bots in the member cache (O(members), only used for seeding/reconciling)"""
+        bots = sum(1 for member in guild.members if member.bot)
+        if guild.chunked:
+            return {"humans": len(guild.members) - bots, "bots": bots}
+        # Without a full cache the gateway member count is the best total we have
+        return {"humans": max((guild.member_count or 0) - bots, 0), "bots": bots}
+    
+    async def seed_member_counts(self, guild):
+        """Seed the member counters of a guild from one member chunk"""
+        if not self.bot.intents.members:
+            # Without the members intent there is no member cache to chunk and no
+            # join/leave/update events, the counters would be wrong and never change
+            print(f"Member counts of {guild.name} unavailable: the members intent is disabled")
+            return
+        if not guild.chunked:
+            try:
+                await guild.chunk()
+            except Exception as e:
+                print(f"Could not chunk members of {guild.name}: {e}")
+        self.get_guild_stats(guild.id).member_counts = self.count_members(guild)
+        self.invalidate_responses(guild.id)
+    
+    def adjust_member_count(self, member, delta):
+        """Keep the member counters current from join/leave events"""
+        counts = self.get_guild_stats(member.guild.id).member_counts
+        if counts is not None:
+            key = "bots" if member.bot else "humans"
+            counts[key] = max(counts[key] + delta, 0)
+    
+    def get_human_member_count(self, guild):
+        """Current number of human members, O(1) once seeded; None without the members intent"""
+        if not self.bot.intents.members:
+            return None
+        guild_stats = self.get_guild_stats(guild.id)
+        if guild_stats.member_counts is None:
+            guild_stats.member_counts = self.count_members(guild)
+        return guild_stats.member_counts["humans"]
+    
+    @tasks.loop(hours=MEMBER_RECONCILE_HOURS)
+    async def reconcile_member_counts(self):
+        """Compare the incremental member counters with the cache and report drift"""
+        try:
+            for guild in self.bot.guilds:
+                guild_stats = self.get_guild_stats(guild.id)
+                if guild_stats.member_counts is None:
+                    continue
+                actual = self.count_members(guild)
+                drift = {key: actual[key] - guild_stats.member_counts[key] for key in actual}
+                if any(drift.values()):
+                    self.invalidate_responses(guild.id)
+                    print(f"Member count drift in {guild.name}: humans {drift['humans']:+d}, bots {drift['bots']:+d}")
+                guild_stats.member_counts = actual
+        except Exception as e:
+            print(f"Error reconciling member counts: {e}")
+    
+    @reconcile_member_counts.before_loop
+    async def before_reconcile(self):
+        await self.bot.wait_until_ready()
+        # The first iteration runs right away, give seeding a head start
+        await asyncio.sleep(60)
+    
+    def load_backfill_checkpoints(self):
+        """Checkpoints of unfinished backfills: {guild_id: {"since", "until", "channels": {...}}}"""
+        try:
+            if os.path.exists(BACKFILL_CHECKPOINT_FILE):
+                with open(BACKFILL_CHECKPOINT_FILE, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"Error loading backfill checkpoints: {e}")
+        return {}
+    
+    async def save_backfill_checkpoints(self):
+        async with self.backfill_lock:
+            payload = json.dumps(self.backfill_checkpoints, indent=2)
+            await asyncio.to_thread(write_file_atomic, BACKFILL_CHECKPOINT_FILE, payload)
+    
+    async def first_recorded_day(self, guild_id, metric, since):
+        """First day on or after ordinal `since` that already has a value for `metric`"""
+        guild_stats = self.get_guild_stats(guild_id)
+        archived_until = guild_stats.archived_until
+        if archived_until is not None and since < archived_until:
+            older = await self.backend.query_range(guild_id, ordinal_to_date(since), ordinal_to_date(archived_until - 1))
+            dates = [date_str for date_str, day in older.items() if day.get(metric)]
+            if dates:
+                return date_to_ordinal(min(dates))
+        hot_start = max(since, archived_until or since)
+        for ordinal, value in guild_stats.series[metric].days.items():
+            if ordinal >= hot_start:
+                return ordinal
+        return None
+    
+    async def merge_daily_counts(self, guild_id, metric, counts, channel_id=None):
+        """Add reconstructed {"YYYY-MM-DD": amount} counts to the existing daily buckets"""
+        guild_stats = self.get_guild_stats(guild_id)
+        channel_cutoff = ordinal_to_date(datetime.now().toordinal() - STATS_HOT_DAYS)
+        async with self.history_lock:
+            async with self.flush_lock:
+                archived = {}
+                for date_str, amount in counts.items():
+                    ordinal = date_to_ordinal(date_str)
+                    if guild_stats.archived_until is not None and ordinal < guild_stats.archived_until:
+                        archived[date_str] = amount
+                        continue
+                    guild_stats.series[metric].days.add(ordinal, amount)
+                    self.pending["daily"][(guild_id, date_str, metric)] += amount
+                    if channel_id is not None and date_str >= channel_cutoff:
+                        guild_stats.channels.add(channel_id, date_str, metric, amount)
+                        self.pending["dimensions"][(guild_id, "channel", channel_id, date_str, metric)] += amount
+                if archived:
+                    await self.backend.merge_archived(guild_id, metric, archived)
+                    # Days read back from the archive are stale now, the next query reloads them
+                    for series in guild_stats.series.values():
+                        series.days.trim_before(guild_stats.archived_until)
+                    guild_stats.loaded_from = None
+        
+        total_key = f"total_{metric}"
+        if total_key in guild_stats.total_stats:
+            guild_stats.total_stats[total_key] += sum(counts.values())
+            self.pending["totals"][(guild_id, total_key)] += sum(counts.values())
+        self.invalidate_responses(guild_id)
+        self.mark_dirty()
+    
+    async def backfill_channel(self, channel, checkpoint, state, progress):
+        """Count the messages of one channel into its checkpoint state, newest first
+        
+        Pages are streamed and only the per-day counts are kept. Returns True once the
+        channel has been crawled back to the start of the backfill range.
+        """
+        since = datetime.fromordinal(checkpoint["since"]).astimezone()
+        until = datetime.fromisoformat(checkpoint["until"])
+        counts = state["counts"]
+        
+        for attempt in range(1, BACKFILL_MAX_RETRIES + 1):
+            before = discord.Object(id=state["before"]) if state["before"] else until
+            try:
+                seen = 0
+                async for message in channel.history(limit=None, before=before, oldest_first=False):
+                    if message.created_at < since:
+                        break
+                    state["before"] = message.id
+                    progress["messages"] += 1
+                    if not message.author.bot:
+                        date_str = self.get_date_string(message.created_at.astimezone())
+                        counts[date_str] = counts.get(date_str, 0) + 1
+                    seen += 1
+                    if seen % BACKFILL_CHECKPOINT_MESSAGES == 0:
+                        await self.save_backfill_checkpoints()
+                return True
+            except discord.Forbidden:
+                print(f"Backfill skipped #{channel.name}: missing access")
+                return False
+            except discord.HTTPException as e:
+                # py-cord retries rate limits itself, whatever still gets here is backed off
+                if e.status != 429 and e.status < 500:
+                    print(f"Backfill of #{channel.name} failed: {e}")
+                    return False
+                await self.save_backfill_checkpoints()
+                delay = 2 ** attempt
+                print(f"Backfill of #{channel.name} got HTTP {e.status}, retrying in {delay}s")
+                await asyncio.sleep(delay)
+        return False
+    
+    async def report_backfill_progress(self, message, progress):
+        """Edit the progress message on a fixed interval"""
+        while True:
+            await asyncio.sleep(BACKFILL_PROGRESS_SECONDS)
+            try:
+                await message.edit(embed=self.backfill_embed(progress))
+            except discord.HTTPException as e:
+                print(f"Could not update backfill progress: {e}")
+    
+    def backfill_embed(self, progress, finished=False):
+        status = "✅ Finished" if finished else "⏳ Running"
+        embed = discord.Embed(
+            title="🗂️ Statistics Backfill",
+            description=f"{status} - {ordinal_to_date(progress['since'])} → {progress['until']}",
+            color=0x00ff00 if finished else 0x0099ff,
+            timestamp=datetime.now()
+        )
+        embed.add_field(
+            name="Progress",
+            value=f"**Channels:** {progress['done']}/{progress['total']}\n"
+                  f"**Failed:** {progress['failed']}\n"
+                  f"**Messages Scanned:** {progress['messages']:,}",
+            inline=False
+        )
+        return embed
+    
+    async def run_backfill(self, guild, progress_message):
+        """Crawl all readable text channels of a guild and merge the per-day message counts"""
+        checkpoint = self.backfill_checkpoints[str(guild.id)]
+        channels = [
+            channel for channel in guild.text_channels
+            if channel.permissions_for(guild.me).read_message_history
+        ]
+        for channel in channels:
+            checkpoint["channels"].setdefault(str(channel.id), {"before": None, "counts": {}, "done": False})
+        progress = {
+            "since": checkpoint["since"],
+            "until": checkpoint["until"][:10],
+            "total": len(channels),
+            "done": sum(1 for channel in channels if checkpoint["channels"][str(channel.id)]["done"]),
+            "failed": 0,
+            "messages": 0
+        }
+        semaphore = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+        
+        async def crawl(channel):
+            state = checkpoint["channels"][str(channel.id)]
+            if state["done"]:
+                return
+            async with semaphore:
+                if await self.backfill_channel(channel, checkpoint, state, progress):
+                    if state["counts"]:
+                        await self.merge_daily_counts(guild.id, "messages", state["counts"], channel.id)
+                        await self.flush_stats()
+                    state["done"] = True
+                    state["counts"] = {}
+                    progress["done"] += 1
+                else:
+                    progress["failed"] += 1
+                await self.save_backfill_checkpoints()
+        
+        reporter = asyncio.create_task(self.report_backfill_progress(progress_message, progress))
+        try:
+            await asyncio.gather(*(crawl(channel) for channel in channels))
+        finally:
+            reporter.cancel()
+            self.backfill_tasks.pop(guild.id, None)
+        
+        # Keep the checkpoint of failed channels so running the command again retries them
+        if not progress["failed"]:
+            self.backfill_checkpoints.pop(str(guild.id), None)
+        await self.save_backfill_checkpoints()
+        try:
+            await progress_message.edit(embed=self.backfill_embed(progress, finished=True))
+        except discord.HTTPException as e:
+            print(f"Could not update backfill progress: {e}")
+        print(f"Backfill of {guild.name} finished: {progress['messages']} messages in {progress['done']} channels")
+    
     # Event Listeners
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Event: Seed member counters once per guild"""
+        for guild in self.bot.guilds:
+            if self.get_guild_stats(guild.id).member_counts is None:
+                await self.seed_member_counts(guild)
+    
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        """Event: Bot joined a guild"""
+        await self.seed_member_counts(guild)
+    
     @commands.Cog.listener()
     async def on_member_join(self, member):
         """Event: New member joined"""
+        self.adjust_member_count(member, 1)
         if not member.bot:  # Ignore bots
-            self.add_stat("new_members")
+            self.add_stat(member.guild.id, "new_members")
             print(f"New member: {member.name} joined {member.guild.name}")
     
     @commands.Cog.listener()
     async def on_member_remove(self, member):
         """Event: Member left the server"""
+        self.adjust_member_count(member, -1)
         if not member.bot:  # Ignore bots
-            self.add_stat("left_members")
+            self.add_stat(member.guild.id, "left_members")
             print(f"Member left: {member.name} left {member.guild.name}")
     
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        """Event: Member changed (only the bot flag matters for the member counters)"""
+        if before.bot != after.bot:
+            self.adjust_member_count(before, -1)
+            self.adjust_member_count(after, 1)
+    
     @commands.Cog.listener()
     async def on_message(self, message):
         """Event: Message was sent"""
         if not message.author.bot and message.guild:  # Ignore bot messages and DMs
-            self.add_stat("messages")
+            self.add_stat(message.guild.id, "messages", channel_id=message.channel.id, member_id=message.author.id)
     
     @commands.Cog.listener()
     async def on_voice_state_update(self, member, before, after):
         """Event: Voice channel status changed"""
         # If someone joins a voice channel
         if before.channel is None and after.channel is not None and not member.bot:
-            self.add_stat("voice_joins")
+            self.add_stat(member.guild.id, "voice_joins", channel_id=after.channel.id, member_id=member.id)
     
     @commands.Cog.listener()
     async def on_reaction_add(self, reaction, user):
         """Event: Reaction added"""
         if not user.bot and reaction.message.guild:
-            self.add_stat("reactions_added")
+            self.add_stat(
+                reaction.message.guild.id,
+                "reactions_added",
+                channel_id=reaction.message.channel.id,
+                member_id=user.id
+            )
     
     @commands.Cog.listener()
     async def on_application_command(self, ctx):
         """Event: Slash command used"""
-        if not ctx.user.bot:
-            self.add_stat("commands_used")
+        if not ctx.user.bot and ctx.guild:
+            self.add_stat(ctx.guild.id, "commands_used", channel_id=ctx.channel_id, member_id=ctx.user.id)
     
     @commands.Cog.listener()
     async def on_guild_channel_create(self, channel):
         """Event: Channel created"""
-        self.add_stat("channels_created")
+        self.add_stat(channel.guild.id, "channels_created")
     
     @commands.Cog.listener()
     async def on_guild_role_create(self, role):
         """Event: Role created"""
-        self.add_stat("roles_created")
+        self.add_stat(role.guild.id, "roles_created")
+    
+    async def build_statistics_fields(self, guild, days, granularity):
+        """Embed fields of /statistics for a range of days"""
+        await self.ensure_history(guild.id, days)
+        guild_stats = self.get_guild_stats(guild.id)
+        today = datetime.now().toordinal()
+        fields = []
+        
+        # Get range statistics
+        range_stats = self.get_range_stats(guild.id, days)
+        total_stats = guild_stats.total_stats
+        breakdown, truncated = self.get_breakdown(guild.id, days, granularity)
+        
+        # Current member count
+        current_members = self.get_human_member_count(guild)
+        
+        # Server info
+        fields.append(dict(
+            name="🏠 Server Info",
+            value=f"**Current Members:** {'unavailable' if current_members is None else f'{current_members:,}'}\n"
+                  f"**Total Channels:** {len(guild.channels)}\n"
+                  f"**Server Created:** {guild.created_at.strftime('%d.%m.%Y')}",
+            inline=True
+        ))
+        
+        # Member statistics
+        net_growth = range_stats['new_members'] - range_stats['left_members']
+        growth_emoji = "📈" if net_growth > 0 else "📉" if net_growth < 0 else "📊"
+        
+        fields.append(dict(
+            name=f"👥 Members ({days} Days)",
+            value=f"**New Members:** {range_stats['new_members']}\n"
+                  f"**Members Left:** {range_stats['left_members']}\n"
+                  f"**Net Growth:** {growth_emoji} {net_growth:+d}",
+            inline=True
+        ))
+        
+        # Activity statistics
+        fields.append(dict(
+            name=f"💬 Activity ({days} Days)",
+            value=f"**Messages:** {range_stats['messages']:,}\n"
+                  f"**Voice Joins:** {range_stats['voice_joins']}\n"
+                  f"**Reactions:** {range_stats['reactions_added']}\n"
+                  f"**Commands Used:** {range_stats['commands_used']}",
+            inline=True
+        ))
+        
+        # Distinct active members
+        fields.append(dict(
+            name="🧑‍🤝‍🧑 Active Members",
+            value=f"**Today (DAU):** {guild_stats.active_member_estimate(today, 1):,}\n"
+                  f"**7 Days (WAU):** {guild_stats.active_member_estimate(today, 7):,}\n"
+                  f"**30 Days (MAU):** {guild_stats.active_member_estimate(today, 30):,}\n"
+                  f"-# Estimated, ±{HyperLogLog.ERROR * 100:.1f}% standard error",
+            inline=True
+        ))
+        
+        # Total statistics
+        fields.append(dict(
+            name="🔢 All-Time Totals",
+            value=f"**Total Joins:** {total_stats['total_joins']:,}\n"
+                  f"**Total Leaves:** {total_stats['total_leaves']:,}\n"
+                  f"**Total Messages:** {total_stats['total_messages']:,}",
+            inline=True
+        ))
+        
+        # Averages
+        avg_messages = range_stats['messages'] / days
+        avg_new_members = range_stats['new_members'] / days
+        # Without the members intent there is no member count to relate the messages to
+        activity_rate = "n/a" if current_members is None else f"{avg_messages / max(current_members, 1) * 100:.1f}%"
+        
+        fields.append(dict(
+            name="📈 Daily Averages",
+            value=f"**Messages:** {avg_messages:.1f}\n"
+                  f"**New Members:** {avg_new_members:.1f}\n"
+                  f"**Activity Rate:** {activity_rate}",
+            inline=True
+        ))
+        
+        # Breakdown in description format
+        breakdown_text = f"**{granularity} Breakdown (Last {days} Days):**\n"
+        for bucket in breakdown:
+            breakdown_text += f"`{bucket['label']}` - "
+            breakdown_text += f"📥{bucket['stats']['new_members']} 📤{bucket['stats']['left_members']} "
+            breakdown_text += f"💬{bucket['stats']['messages']}\n"
+        if truncated:
+            breakdown_text += f"-# Showing the latest {MAX_BREAKDOWN_ROWS} buckets\n"
+        
+        fields.append(dict(
+            name=f"📅 {granularity} Breakdown",
+            value=breakdown_text,
+            inline=False
+        ))
+        
+        # Top channels (exact, from the channel dimension) and members (heavy hitters)
+        for window in (7, 30):
+            top_channels = self.get_channel_breakdown(guild.id, window)
+            if top_channels:
+                fields.append(dict(
+                    name=f"#️⃣ Top Channels ({window} Days)",
+                    value="\n".join(
+                        f"`{rank}.` <#{channel_id}> - 💬{count:,}"
+                        for rank, (channel_id, count) in enumerate(top_channels, 1)
+                    ),
+                    inline=True
+                ))
+        for window in (7, 30):
+            top_members = guild_stats.get_top_members(today, window)
+            if top_members:
+                fields.append(dict(
+                    name=f"🏆 Top Members ({window} Days)",
+                    value="\n".join(
+                        f"`{rank}.` <@{member_id}> - 💬~{count:,}"
+                        for rank, (member_id, count) in enumerate(top_members, 1)
+                    ),
+                    inline=True
+                ))
+        
+        return fields
     
-    @discord.slash_command(name="statistics", description="Show server statistics for the last 7 days")
-    async def statistics(self, ctx):
+    @discord.slash_command(name="statistics", description="Show server statistics for a range of days")
+    async def statistics(
+        self,
+        ctx,
+        days: Option(int, "Number of days to include", min_value=1, max_value=STATS_MAX_QUERY_DAYS, default=7),
+        granularity: Option(str, "Breakdown granularity", choices=list(GRANULARITIES), default="Day")
+    ):
         """Slash command for server statistics"""
         try:
             await ctx.defer()  # Defer the response for processing time
             
-            # Get 7-day statistics
-            stats_7_days = self.get_7_day_stats()
-            total_stats = self.stats_data["total_stats"]
-            daily_breakdown = self.get_daily_breakdown()
-            
-            # Current member count
-            current_members = len([m for m in ctx.guild.members if not m.bot])
+            fields = await self.get_cached_response(
+                ctx.guild.id, f"statistics:{days}:{granularity}", self.build_statistics_fields, ctx.guild, days, granularity
+            )
             
             # Create main embed
             embed = discord.Embed(
                 title=f"<:statistics:1411782823454441514> Server Statistics - {ctx.guild.name}",
-                description="Statistics for the last 7 days",
+                description=f"Statistics for the last {days} day(s)",
                 color=0x00ff00,
                 timestamp=datetime.now()
             )
-            
-            # Server info
-            embed.add_field(
-                name="🏠 Server Info",
-                value=f"**Current Members:** {current_members:,}\n"
-                      f"**Total Channels:** {len(ctx.guild.channels)}\n"
-                      f"**Server Created:** {ctx.guild.created_at.strftime('%d.%m.%Y')}",
-                inline=True
-            )
-            
-            # 7-day member statistics
-            net_growth = stats_7_days['new_members'] - stats_7_days['left_members']
-            growth_emoji = "📈" if net_growth > 0 else "📉" if net_growth < 0 else "📊"
-            
-            embed.add_field(
-                name="👥 Members (7 Days)",
-                value=f"**New Members:** {stats_7_days['new_members']}\n"
-                      f"**Members Left:** {stats_7_days['left_members']}\n"
-                      f"**Net Growth:** {growth_emoji} {net_growth:+d}",
-                inline=True
-            )
-            
-            # Activity statistics
-            embed.add_field(
-                name="💬 Activity (7 Days)",
-                value=f"**Messages:** {stats_7_days['messages']:,}\n"
-                      f"**Voice Joins:** {stats_7_days['voice_joins']}\n"
-                      f"**Reactions:** {stats_7_days['reactions_added']}\n"
-                      f"**Commands Used:** {stats_7_days['commands_used']}",
-                inline=True
-            )
-            
-            # Total statistics
-            embed.add_field(
-                name="🔢 All-Time Totals",
-                value=f"**Total Joins:** {total_stats['total_joins']:,}\n"
-                      f"**Total Leaves:** {total_stats['total_leaves']:,}\n"
-                      f"**Total Messages:** {total_stats['total_messages']:,}",
-                inline=True
-            )
-            
-            # Averages
-            avg_messages = stats_7_days['messages'] / 7
-            avg_new_members = stats_7_days['new_members'] / 7
-            activity_rate = (avg_messages / max(current_members, 1)) * 100
-            
-            embed.add_field(
-                name="📈 Daily Averages",
-                value=f"**Messages:** {avg_messages:.1f}\n"
-                      f"**New Members:** {avg_new_members:.1f}\n"
-                      f"**Activity Rate:** {activity_rate:.1f}%",
-                inline=True
-            )
-            
-            # Daily breakdown in description format
-            breakdown_text = "**Daily Breakdown (Last 7 Days):**\n"
-            for day in daily_breakdown:
-                breakdown_text += f"`{day['day']} {day['date'][-5:]}` - "
-                breakdown_text += f"📥{day['stats']['new_members']} 📤{day['stats']['left_members']} "
-                breakdown_text += f"💬{day['stats']['messages']}\n"
-            
-            embed.add_field(
-                name="📅 Daily Breakdown",
-                value=breakdown_text,
-                inline=False
-            )
+            for field in fields:
+                embed.add_field(**field)
             
             # Add footer
             embed.set_footer(
@@ -325,10 +1972,25 @@ class ServerStats(commands.Cog):
     @discord.slash_command(name="reset_stats", description="Reset server statistics (Admin only)")
     @commands.has_permissions(administrator=True)
     async def reset_stats(self, ctx):
-        """Reset all statistics (Admin only)"""
+        """Reset all statistics of this server (Admin only)"""
         try:
-            self.stats_data = self.create_empty_stats()
-            self.save_stats()
+            guild_id = ctx.guild.id
+            async with self.flush_lock:
+                member_counts = self.get_guild_stats(guild_id).member_counts
+                self.guilds[guild_id] = GuildStats(guild_id)
+                self.guilds[guild_id].member_counts = member_counts
+                for name, deltas in self.pending.items():
+                    for key in [key for key in deltas if key[0] == guild_id]:
+                        del deltas[key]
+                await self.backend.reset(guild_id)
+            task = self.backfill_tasks.pop(guild_id, None)
+            if task is not None:
+                task.cancel()
+            if self.backfill_checkpoints.pop(str(guild_id), None) is not None:
+                await self.save_backfill_checkpoints()
+            self.invalidate_responses(guild_id)
+            self.mark_dirty()
+            await self.flush_stats()
             
             embed = discord.Embed(
                 title="🔄 Statistics Reset",
@@ -343,56 +2005,148 @@ class ServerStats(commands.Cog):
             print(f"Error resetting statistics: {e}")
             await ctx.respond("❌ An error occurred while resetting statistics.", ephemeral=True)
     
-    @discord.slash_command(name="export_stats", description="Export statistics as JSON file (Admin only)")
+    @discord.slash_command(name="backfill_stats", description="Rebuild daily message counts from channel history (Admin only)")
     @commands.has_permissions(administrator=True)
-    async def export_stats(self, ctx):
-        """Export statistics as downloadable JSON file"""
+    async def backfill_stats(
+        self,
+        ctx,
+        days: Option(int, "Number of days to reconstruct", min_value=1, max_value=BACKFILL_MAX_DAYS, default=STATS_MAX_QUERY_DAYS)
+    ):
+        """Reconstruct per-day message counts for the days before statistics were recorded"""
+        try:
+            guild_id = ctx.guild.id
+            if guild_id in self.backfill_tasks:
+                await ctx.respond("⏳ A backfill is already running on this server.", ephemeral=True)
+                return
+            
+            checkpoint = self.backfill_checkpoints.get(str(guild_id))
+            if checkpoint is None:
+                since = datetime.now().toordinal() - days + 1
+                # Only days before the first recorded message count, so nothing is counted twice
+                first = await self.first_recorded_day(guild_id, "messages", since)
+                if first is not None and first <= since:
+                    await ctx.respond("✅ Message counts already cover this range.", ephemeral=True)
+                    return
+                until = datetime.fromordinal(first).astimezone() if first is not None else datetime.now().astimezone()
+                checkpoint = self.backfill_checkpoints[str(guild_id)] = {
+                    "since": since,
+                    "until": until.isoformat(),
+                    "channels": {}
+                }
+                await self.save_backfill_checkpoints()
+                note = "Backfill started."
+            else:
+                note = "Resuming the unfinished backfill from its checkpoint."
+            
+            await ctx.respond(f"🗂️ {note} Progress is posted below.", ephemeral=True)
+            progress_message = await ctx.channel.send(embed=discord.Embed(
+                title="🗂️ Statistics Backfill",
+                description="⏳ Starting...",
+                color=0x0099ff
+            ))
+            self.backfill_tasks[guild_id] = asyncio.create_task(self.run_backfill(ctx.guild, progress_message))
+            
+        except Exception as e:
+            print(f"Error starting backfill: {e}")
+            await ctx.respond("❌ An error occurred while starting the backfill.", ephemeral=True)
+    
+    async def collect_export_rows(self, guild_id, start, end, metrics):
+        """Snapshot (date, values) rows between two day ordinals, archived days come from the backend"""
+        guild_stats = self.get_guild_stats(guild_id)
+        series = guild_stats.series
+        memory_start = guild_stats.archived_until or start
+        rows = []
+        
+        if start < memory_start:
+            older = await self.backend.query_range(
+                guild_id, ordinal_to_date(start), ordinal_to_date(min(end, memory_start - 1))
+            )
+            for date_str in sorted(older):
+                rows.append((date_str, [older[date_str].get(metric, 0) for metric in metrics]))
+        
+        # Copy the in-memory slices on the loop so the worker thread sees a consistent snapshot
+        for ordinal in range(max(start, memory_start), end + 1):
+            values = [series[metric].days.get(ordinal) for metric in metrics]
+            if any(values):
+                rows.append((ordinal_to_date(ordinal), values))
+        return rows
+    
+    @discord.slash_command(name="export_stats", description="Export statistics as JSON, NDJSON or CSV (Admin only)")
+    @commands.has_permissions(administrator=True)
+    async def export_stats(
+        self,
+        ctx,
+        export_format: Option(str, "Export format", name="format", choices=list(EXPORT_FORMATS), default="JSON"),
+        compress: Option(bool, "Gzip-compress the exported files", default=False),
+        date_from: Option(str, "First day to export (YYYY-MM-DD)", name="from", default=None),
+        date_to: Option(str, "Last day to export (YYYY-MM-DD)", name="to", default=None),
+        metrics: Option(str, "Comma-separated metrics, e.g. messages,new_members", default=None)
+    ):
+        """Export statistics as downloadable files"""
         try:
             await ctx.defer(ephemeral=True)
             
+            try:
+                start = date_to_ordinal(date_from or EXPORT_EARLIEST_DATE)
+                end = date_to_ordinal(date_to) if date_to else datetime.now().toordinal()
+            except ValueError:
+                await ctx.followup.send("❌ Dates must use the format YYYY-MM-DD.", ephemeral=True)
+                return
+            
+            selected = [metric.strip() for metric in metrics.split(",")] if metrics else list(DAILY_METRICS)
+            unknown = [metric for metric in selected if metric not in DAILY_METRICS]
+            if unknown or start > end:
+                await ctx.followup.send(
+                    f"❌ Invalid export range or metrics. Available metrics: {', '.join(DAILY_METRICS)}",
+                    ephemeral=True
+                )
+                return
+            
             # Create export data with readable timestamps
-            export_data = {
+            guild_stats = self.get_guild_stats(ctx.guild.id)
+            meta = {
                 "server_name": ctx.guild.name,
                 "server_id": ctx.guild.id,
                 "export_date": datetime.now().isoformat(),
-                "statistics": self.stats_data
+                "total_stats": dict(guild_stats.total_stats)
             }
+            rows = await self.collect_export_rows(ctx.guild.id, start, end, selected)
+            basename = f"stats_export_{ctx.guild.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
             
-            # Save to temporary file
-            export_filename = f"stats_export_{ctx.guild.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            
-            with open(export_filename, 'w', encoding='utf-8') as f:
-                json.dump(export_data, f, indent=2, ensure_ascii=False)
+            # Serialize off the event loop, straight into memory
+            parts = await asyncio.to_thread(build_export, export_format, selected, meta, rows, compress, basename)
             
-            # Send file
-            with open(export_filename, 'rb') as f:
-                file = discord.File(f, filename=export_filename)
+            for index, message_parts in enumerate(group_export_parts(parts)):
+                files = [discord.File(io.BytesIO(data), filename=filename) for filename, data in message_parts]
                 await ctx.followup.send(
-                    "📁 Here's your statistics export:",
-                    file=file,
+                    "📁 Here's your statistics export:" if index == 0 else "📁 Export continued:",
+                    files=files,
                     ephemeral=True
                 )
             
-            # Clean up temporary file
-            os.remove(export_filename)
-            
         except Exception as e:
             print(f"Error exporting statistics: {e}")
             await ctx.followup.send("❌ An error occurred while exporting statistics.", ephemeral=True)
     
+    async def build_summary_fields(self, guild_id):
+        """Embed fields of /stats_summary"""
+        today_stats = self.get_guild_stats(guild_id).day_stats(self.get_today_string())
+        return [dict(
+            name="Today's Activity",
+            value=f"**New Members:** {today_stats['new_members']}\n"
+                  f"**Members Left:** {today_stats['left_members']}\n"
+                  f"**Messages:** {today_stats['messages']:,}\n"
+                  f"**Voice Joins:** {today_stats['voice_joins']}\n"
+                  f"**Reactions:** {today_stats['reactions_added']}\n"
+                  f"**Commands:** {today_stats['commands_used']}",
+            inline=False
+        )]
+    
     @discord.slash_command(name="stats_summary", description="Show a quick summary of today's statistics")
     async def stats_summary(self, ctx):
         """Quick summary of today's stats"""
         try:
-            today = self.get_today_string()
-            today_stats = self.stats_data["daily_stats"].get(today, {
-                "new_members": 0,
-                "left_members": 0,
-                "messages": 0,
-                "voice_joins": 0,
-                "reactions_added": 0,
-                "commands_used": 0
-            })
+            fields = await self.get_cached_response(ctx.guild.id, "stats_summary", self.build_summary_fields, ctx.guild.id)
             
             embed = discord.Embed(
                 title="📈 Today's Summary",
@@ -400,17 +2154,8 @@ class ServerStats(commands.Cog):
                 color=0x0099ff,
                 timestamp=datetime.now()
             )
-            
-            embed.add_field(
-                name="Today's Activity",
-                value=f"**New Members:** {today_stats['new_members']}\n"
-                      f"**Members Left:** {today_stats['left_members']}\n"
-                      f"**Messages:** {today_stats['messages']:,}\n"
-                      f"**Voice Joins:** {today_stats['voice_joins']}\n"
-                      f"**Reactions:** {today_stats['reactions_added']}\n"
-                      f"**Commands:** {today_stats['commands_used']}",
-                inline=False
-            )
+            for field in fields:
+                embed.add_field(**field)
             
             await ctx.respond(embed=embed)
             
@@ -418,35 +2163,97 @@ class ServerStats(commands.Cog):
             print(f"Error in stats summary: {e}")
             await ctx.respond("❌ An error occurred while generating today's summary.")
     
-    @tasks.loop(hours=24)
-    async def cleanup_old_stats(self):
-        """Clean up statistics older than 30 days"""
+    @discord.slash_command(name="activity", description="Show activity of the last 60 minutes and the peak hours")
+    async def activity(self, ctx):
+        """Live activity view backed by the minute/hour rollups"""
         try:
-            cutoff_date = datetime.now() - timedelta(days=30)
-            cutoff_str = self.get_date_string(cutoff_date)
+            last_hour = self.get_recent_minutes(ctx.guild.id, "messages", 60)
+            last_hour_reactions = sum(self.get_recent_minutes(ctx.guild.id, "reactions_added", 60))
+            last_hour_voice = sum(self.get_recent_minutes(ctx.guild.id, "voice_joins", 60))
+            last_day = sum(self.get_recent_minutes(ctx.guild.id, "messages", MINUTE_BUCKETS))
+            peak_hours = self.get_peak_hours(ctx.guild.id)
             
-            dates_to_remove = []
-            for date_str in self.stats_data["daily_stats"]:
-                if date_str < cutoff_str:
-                    dates_to_remove.append(date_str)
+            embed = discord.Embed(
+                title="⏱️ Live Activity",
+                description=f"Activity on {ctx.guild.name}",
+                color=0x0099ff,
+                timestamp=datetime.now()
+            )
             
-            for date_str in dates_to_remove:
-                del self.stats_data["daily_stats"][date_str]
+            busiest = max(last_hour)
+            embed.add_field(
+                name="Last 60 Minutes",
+                value=f"**Messages:** {sum(last_hour):,}\n"
+                      f"**Reactions:** {last_hour_reactions}\n"
+                      f"**Voice Joins:** {last_hour_voice}\n"
+                      f"**Busiest Minute:** {busiest} message(s)",
+                inline=True
+            )
+            
+            embed.add_field(
+                name="Last 24 Hours",
+                value=f"**Messages:** {last_day:,}",
+                inline=True
+            )
+            
+            if peak_hours:
+                peak_text = "\n".join(
+                    f"`{hour:02d}:00-{(hour + 1) % 24:02d}:00` - 💬{count:,}" for hour, count in peak_hours
+                )
+            else:
+                peak_text = "No activity recorded yet"
+            embed.add_field(
+                name="🔥 Peak Hours (90 Days)",
+                value=peak_text,
+                inline=False
+            )
+            
+            await ctx.respond(embed=embed)
             
-            if dates_to_remove:
-                self.save_stats()
-                print(f"Cleaned up {len(dates_to_remove)} old statistic entries")
-                
         except Exception as e:
-            print(f"Error during cleanup: {e}")
+            print(f"Error in activity command: {e}")
+            await ctx.respond("❌ An error occurred while generating the activity overview.")
     
-    @cleanup_old_stats.before_loop
-    async def before_cleanup(self):
-        await self.bot.wait_until_ready()
+    @discord.slash_command(name="cache_stats", description="Show hit/miss counts of the response caches (Admin only)")
+    @commands.has_permissions(administrator=True)
+    async def cache_stats(self, ctx):
+        """Hit/miss counts of every cog that caches rendered responses"""
+        embed = discord.Embed(title="🗄️ Response Caches", color=0x0099ff, timestamp=datetime.now())
+        for name, cog in self.bot.cogs.items():
+            cache = getattr(cog, "response_cache", None)
+            if cache is None:
+                continue
+            counts = getattr(cache, "hit_miss_ratio", {"total": 0, "hits": 0, "hit_ratio": 0})
+            embed.add_field(
+                name=name,
+                value=f"**Hits:** {counts['hits']:,}\n"
+                      f"**Misses:** {counts['total'] - counts['hits']:,}\n"
+                      f"**Hit Rate:** {counts['hit_ratio'] * 100:.1f}%",
+                inline=True
+            )
+        await ctx.respond(embed=embed, ephemeral=True)
     
     def cog_unload(self):
         """Clean up when cog is unloaded"""
         self.cleanup_old_stats.cancel()
+        # stop() lets a running flush finish, the final flush comes after it
+        self.periodic_flush.stop()
+        self.reconcile_member_counts.cancel()
+        for task in self.backfill_tasks.values():
+            task.cancel()
+        try:
+            self.shutdown_task = asyncio.get_running_loop().create_task(self.shutdown())
+        except RuntimeError:
+            self.save_stats()
+    
+    async def shutdown(self):
+        """Final flush on unload or bot shutdown (see main.py), then close the backend"""
+        if self.closed:
+            return
+        self.closed = True
+        await asyncio.gather(*self.flush_tasks, return_exceptions=True)
+        await self.flush_stats()
+        await self.backend.close()
 
 # Setup function for loading the cog
 def setup(bot):
@@ -1,17 +1,744 @@
 import json
+import gzip
 import discord
 from discord.ext import commands, tasks
 import os
-from datetime import datetime
+import time
+import asyncio
+import aiosqlite
+from datetime import datetime, timedelta, time as clock_time
+import math
+import heapq
+import itertools
 import pytz
-from discord.ui import Container
-from discord import SeparatorSpacingSize
+from aiocache import SimpleMemoryCache
+from aiocache.plugins import HitMissRatioPlugin
+from discord import Option
+from components import render
 
 banner = "https://cdn.discordapp.com/attachments/1384650878161784934/1406659991309648002/ticket.png?ex=68a345b4&is=68a1f434&hm=16cd2ad91e53ac2ba0d6074fbfb7022dcbfa736a8ac6377264314d06706e8848&"
 
+# The rendered rating average is cached for a short time; a new rating bumps the
+# cache version, which makes the old entry unreachable
+RESPONSE_CACHE_TTL = 60
+
+# Tickets and rating requests live in SQLite; the JSON files they used to live in are imported once
+TICKET_DB_FILE = "data/tickets.db"
+TICKET_INFO_FILE = "data/ticket_info.json"
+RATING_MESSAGES_FILE = "data/rating_messages.json"
+
+# Ratings are kept as sum/count plus a five-bucket histogram (all-time and per
+# day for the last RATING_WINDOW_DAYS days) instead of a list of every rating
+RATING_WINDOW_DAYS = 30
+
+# Rated rating requests are switched to the disabled view in the background after
+# a restart, RECONCILE_CONCURRENCY at a time; requests are forgotten after
+# RATING_MESSAGE_RETENTION_DAYS days
+RECONCILE_CONCURRENCY = 5
+RATING_MESSAGE_RETENTION_DAYS = 90
+
+# Transcripts are streamed page by page into gzip NDJSON files before a ticket
+# channel is deleted; at most TRANSCRIPT_QUEUE_PAGES pages wait for the writer
+TRANSCRIPT_DIR = "data/transcripts"
+TRANSCRIPT_QUEUE_PAGES = 4
+TRANSCRIPT_PAGE_SIZE = 100
+
+# Archived messages are indexed in an FTS5 table while the transcript is written;
+# /ticket search shows the best SEARCH_RESULTS tickets
+SEARCH_RESULTS = 10
+SEARCH_SNIPPET_TOKENS = 16
+
+# New tickets take a pre-created hidden channel (with the welcome panel already
+# posted) from a pool in the ticket category; the pool is refilled by at most one
+# channel every TICKET_POOL_REFILL_SECONDS to stay clear of the channel rate limits
+TICKET_CATEGORY_ID = 1421784692969177200
+TICKET_POOL_SIZE = 3
+TICKET_POOL_REFILL_SECONDS = 10
+TICKET_POOL_NAME = "pool-ticket"
+
+# Open tickets are indexed by creator, so a user with MAX_OPEN_TICKETS_PER_USER
+# open tickets is pointed to them without any REST call
+MAX_OPEN_TICKETS_PER_USER = 1
+
+# Ticket log entries are queued and sent by one writer in order, up to
+# LOG_BATCH_SIZE embeds per message, at the latest LOG_FLUSH_SECONDS after the
+# first queued entry; a rate-limited flush is retried with exponential backoff
+TICKET_LOG_CHANNEL_ID = 1421833160492187759
+LOG_BATCH_SIZE = 10
+LOG_FLUSH_SECONDS = 2
+LOG_MAX_RETRIES = 5
+# On shutdown the queued entries are still sent, for at most this long
+LOG_SHUTDOWN_SECONDS = 10
+
+# Support opening hours as (open, close) "HH:MM" periods per weekday (0 = Monday)
+# in OPENING_TIMEZONE. HOLIDAYS replace the periods of a day, keyed "YYYY-MM-DD"
+# or "MM-DD" for every year; an empty list keeps support closed all day. The
+# status message is only edited when support opens or closes.
+OPENING_TIMEZONE = "Europe/Berlin"
+OPENING_HOURS = {
+    0: [("08:00", "18:00")],
+    1: [("08:00", "18:00")],
+    2: [("08:00", "18:00")],
+    3: [("08:00", "18:00")],
+    4: [("08:00", "18:00")],
+    5: [("08:00", "20:00")],
+    6: [("08:00", "20:00")]
+}
+HOLIDAYS = {
+    "12-24": [("08:00", "12:00")],
+    "12-25": [],
+    "12-26": [],
+    "12-31": [("08:00", "12:00")],
+    "01-01": []
+}
+HOLIDAY_NOTICE_DAYS = 14
+# The scheduler wakes up at least this often, so a changed clock is noticed
+OPENING_HOURS_MAX_SLEEP = 3600
+
+# Wait (open -> first claim) and handle (claim -> close) times are counted into
+# fixed log-scale buckets, SLA_BUCKETS_PER_DOUBLING per doubling of the duration,
+# per day and per staff member and per hour of day the ticket was opened; a
+# percentile over a window only sums the daily buckets
+SLA_BUCKETS_PER_DOUBLING = 4
+SLA_RETENTION_DAYS = 365
+SLA_PERCENTILES = (0.5, 0.9, 0.99)
+
+# Unclaimed tickets are assigned oldest first to the available staff member with
+# the fewest claimed tickets, as long as that is below DISPATCH_MAX_CLAIMS; staff
+# opt in and out with /ticket available and /ticket away
+DISPATCH_MAX_CLAIMS = 3
+
 # Ensure data directory exists
 os.makedirs("data", exist_ok=True)
 
+
+def transcript_entry(message):
+    """One transcript line of a message"""
+    return {
+        "id": message.id,
+        "created_at": message.created_at.isoformat(),
+        "author_id": message.author.id,
+        "author": str(message.author),
+        "content": message.content,
+        "attachments": [attachment.url for attachment in message.attachments],
+        "embeds": [embed.to_dict() for embed in message.embeds]
+    }
+
+
+def sla_bucket(seconds):
+    """Log-scale bucket of a duration; durations under a second share bucket 0"""
+    return int(math.log2(max(seconds, 1)) * SLA_BUCKETS_PER_DOUBLING)
+
+
+def sla_bucket_value(bucket):
+    """Geometric middle of a bucket, within about 9% of every duration in it"""
+    return 2 ** ((bucket + 0.5) / SLA_BUCKETS_PER_DOUBLING)
+
+
+def sla_percentiles(histogram, percentiles=SLA_PERCENTILES):
+    """Percentiles of a {bucket: count} histogram, None for an empty one"""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    values = []
+    buckets = sorted(histogram.items())
+    for percentile in percentiles:
+        rank = max(1, math.ceil(percentile * total))
+        seen = 0
+        for bucket, count in buckets:
+            seen += count
+            if seen >= rank:
+                values.append(sla_bucket_value(bucket))
+                break
+    return values
+
+
+def format_duration(seconds):
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m"
+    if seconds < 86400:
+        return f"{seconds / 3600:.1f}h"
+    return f"{seconds / 86400:.1f}d"
+
+
+class ClaimDispatcher:
+    """Unclaimed tickets by age and available staff by open claims, as two heaps
+
+    Entries are invalidated lazily: a ticket entry counts while the ticket still
+    waits with that opening time, a staff entry while it is the newest entry of an
+    available staff member. Every change pushes one entry, so updates and
+    assignments are O(log n).
+    """
+
+    def __init__(self):
+        self.ticket_heap = []  # (opened_at, channel_id)
+        self.waiting = {}  # channel_id -> opened_at
+        self.released_by = {}  # channel_id -> staff member who released it, not assigned to them again
+        self.staff_heap = []  # (claims, sequence, staff_id)
+        self.loads = {}  # staff_id -> open claims
+        self.entries = {}  # staff_id -> sequence of the current heap entry
+        self.available = set()
+        self.sequence = itertools.count()
+
+    def add_ticket(self, channel_id, opened_at, released_by=None):
+        self.waiting[channel_id] = opened_at
+        if released_by:
+            self.released_by[channel_id] = released_by
+        heapq.heappush(self.ticket_heap, (opened_at, channel_id))
+
+    def remove_ticket(self, channel_id):
+        self.waiting.pop(channel_id, None)
+        self.released_by.pop(channel_id, None)
+
+    def push_staff(self, staff_id):
+        sequence = next(self.sequence)
+        self.entries[staff_id] = sequence
+        heapq.heappush(self.staff_heap, (self.loads.get(staff_id, 0), sequence, staff_id))
+
+    def change_load(self, staff_id, delta):
+        self.loads[staff_id] = max(self.loads.get(staff_id, 0) + delta, 0)
+        if staff_id in self.available:
+            self.push_staff(staff_id)
+
+    def set_available(self, staff_id, available):
+        if available and staff_id not in self.available:
+            self.available.add(staff_id)
+            self.push_staff(staff_id)
+        elif not available:
+            self.available.discard(staff_id)
+            self.entries.pop(staff_id, None)
+
+    def pop_stale_staff(self):
+        while self.staff_heap and self.entries.get(self.staff_heap[0][2]) != self.staff_heap[0][1]:
+            heapq.heappop(self.staff_heap)
+
+    def least_loaded(self, exclude=None):
+        """(claims, sequence, staff_id) of the least-loaded available staff member other than exclude"""
+        self.pop_stale_staff()
+        if not self.staff_heap or self.staff_heap[0][2] != exclude:
+            return self.staff_heap[0] if self.staff_heap else None
+        excluded = heapq.heappop(self.staff_heap)
+        self.pop_stale_staff()
+        candidate = self.staff_heap[0] if self.staff_heap else None
+        heapq.heappush(self.staff_heap, excluded)
+        return candidate
+
+    def next_assignment(self, max_claims):
+        """(channel_id, staff_id) of the next assignment, or None; the caller applies it"""
+        parked = []
+        assignment = None
+        while self.ticket_heap:
+            opened_at, channel_id = self.ticket_heap[0]
+            if self.waiting.get(channel_id) != opened_at:
+                heapq.heappop(self.ticket_heap)
+                continue
+            entry = self.least_loaded(exclude=self.released_by.get(channel_id))
+            if entry is not None and entry[0] < max_claims:
+                assignment = (channel_id, entry[2])
+                break
+            if entry is not None or channel_id not in self.released_by:
+                break
+            # Only the staff member who released the ticket is free: newer tickets go first
+            parked.append(heapq.heappop(self.ticket_heap))
+        for item in parked:
+            heapq.heappush(self.ticket_heap, item)
+        return assignment
+
+
+class OpeningSchedule:
+    """Weekly opening hours with holiday exceptions, evaluated in a timezone"""
+
+    DAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+    SEARCH_DAYS = 31
+
+    def __init__(self, weekly, holidays, timezone):
+        self.weekly = weekly
+        self.holidays = holidays
+        self.timezone = timezone
+
+    @staticmethod
+    def minutes(value):
+        hours, minutes = value.split(":")
+        return int(hours) * 60 + int(minutes)
+
+    def localize(self, naive):
+        # normalize() moves times that fall into a DST gap behind the gap
+        return self.timezone.normalize(self.timezone.localize(naive))
+
+    def day_periods(self, day):
+        if day.isoformat() in self.holidays:
+            return self.holidays[day.isoformat()]
+        return self.holidays.get(day.strftime("%m-%d"), self.weekly.get(day.weekday(), []))
+
+    def periods(self, day):
+        """Aware (start, end) datetimes of the periods of a date"""
+        midnight = datetime.combine(day, clock_time())
+        return [
+            (self.localize(midnight + timedelta(minutes=self.minutes(start))),
+             self.localize(midnight + timedelta(minutes=self.minutes(end))))
+            for start, end in self.day_periods(day)
+        ]
+
+    def state(self, now):
+        """(is_open, next_transition) at an aware datetime; next_transition is None if support never opens"""
+        today = now.astimezone(self.timezone).date()
+        periods = sorted(
+            period for offset in range(-1, self.SEARCH_DAYS) for period in self.periods(today + timedelta(days=offset))
+        )
+
+        # Periods that touch or overlap, e.g. across midnight, are one opening
+        merged = []
+        for start, end in periods:
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+
+        for start, end in merged:
+            if start <= now < end:
+                return True, end
+            if start > now:
+                return False, start
+        return False, None
+
+    @staticmethod
+    def format_periods(periods):
+        if not periods:
+            return "Closed"
+        return ", ".join(
+            f"{OpeningSchedule.format_clock(start)} - {OpeningSchedule.format_clock(end)}" for start, end in periods
+        )
+
+    @staticmethod
+    def format_clock(value):
+        minutes = OpeningSchedule.minutes(value) % (24 * 60)
+        hour = minutes // 60 % 12 or 12
+        return f"{hour}:{minutes % 60:02d} {'AM' if minutes < 12 * 60 else 'PM'}"
+
+    def text(self, today):
+        """Opening hours grouped by runs of weekdays with equal hours, plus upcoming holidays"""
+        lines = ["**📅 Opening Hours:**"]
+        first = 0
+        for weekday in range(1, 8):
+            if weekday < 7 and self.weekly.get(weekday, []) == self.weekly.get(first, []):
+                continue
+            days = self.DAY_NAMES[first] if first == weekday - 1 else f"{self.DAY_NAMES[first]} - {self.DAY_NAMES[weekday - 1]}"
+            lines.append(f"**{days}:** {self.format_periods(self.weekly.get(first, []))}")
+            first = weekday
+
+        for offset in range(HOLIDAY_NOTICE_DAYS):
+            day = today + timedelta(days=offset)
+            if day.isoformat() in self.holidays or day.strftime("%m-%d") in self.holidays:
+                lines.append(f"**{day.strftime('%B')} {day.day} (Holiday):** {self.format_periods(self.day_periods(day))}")
+        return "\n".join(lines)
+
+
+class TranscriptWriter:
+    """Gzip NDJSON transcript file, written page by page from a worker thread"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.messages = 0
+
+    def write_page(self, entries):
+        if self.file is None:
+            self.file = gzip.open(self.path, "wt", encoding="utf-8")
+        for entry in entries:
+            self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.messages += len(entries)
+
+    def close(self):
+        """Finish the file and return its size in bytes"""
+        if self.file is None:
+            self.file = gzip.open(self.path, "wt", encoding="utf-8")
+        self.file.close()
+        return os.path.getsize(self.path)
+
+
+def read_transcript(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def search_query(text):
+    """FTS5 query that matches all words of the text, whatever characters they contain"""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+class TicketStore:
+    """Tickets and rating requests in an aiosqlite database
+    
+    Tickets are looked up by channel through an in-memory read-through cache. State
+    changes are single conditional UPDATEs, so two simultaneous clicks cannot both
+    close (or claim) the same ticket and no write is lost.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tickets (
+            ticket_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            channel_id INTEGER NOT NULL,
+            creator_id INTEGER NOT NULL,
+            name TEXT,
+            status TEXT NOT NULL DEFAULT 'open',
+            claimed_by INTEGER,
+            opened_at REAL NOT NULL,
+            claimed_at REAL,
+            closed_at REAL,
+            transcript_path TEXT,
+            first_claimed_at REAL,
+            unclaimed_at REAL,
+            search_indexed_at REAL
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_tickets_channel ON tickets (channel_id);
+        CREATE INDEX IF NOT EXISTS idx_tickets_creator ON tickets (creator_id);
+        CREATE INDEX IF NOT EXISTS idx_tickets_status ON tickets (status);
+        CREATE INDEX IF NOT EXISTS idx_tickets_claimed_by ON tickets (claimed_by);
+        CREATE TABLE IF NOT EXISTS rating_messages (
+            message_id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            guild_id INTEGER,
+            ticket_name TEXT,
+            created_at REAL NOT NULL,
+            channel_id INTEGER,
+            reconciled_at REAL
+        );
+        CREATE TABLE IF NOT EXISTS sla_histograms (
+            day TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            dimension TEXT NOT NULL,
+            key INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (metric, dimension, day, key, bucket)
+        );
+        CREATE TABLE IF NOT EXISTS staff_availability (
+            staff_id INTEGER PRIMARY KEY,
+            available INTEGER NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE VIRTUAL TABLE IF NOT EXISTS transcript_search USING fts5 (
+            content,
+            author UNINDEXED,
+            channel_id UNINDEXED,
+            message_id UNINDEXED,
+            created_at UNINDEXED,
+            tokenize = 'unicode61 remove_diacritics 2'
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+    COLUMNS = (
+        "ticket_id, guild_id, channel_id, creator_id, name, status, claimed_by, "
+        "opened_at, claimed_at, closed_at, transcript_path, first_claimed_at, unclaimed_at, search_indexed_at"
+    )
+
+    def __init__(self, path):
+        self.path = path
+        self.db = None
+        self.connect_lock = asyncio.Lock()
+        self.cache = {}  # channel_id -> ticket dict (None if the channel is no ticket)
+
+    async def connect(self):
+        async with self.connect_lock:
+            if self.db is None:
+                db = await aiosqlite.connect(self.path)
+                db.row_factory = aiosqlite.Row
+                await db.execute("PRAGMA journal_mode=WAL")
+                await db.execute("PRAGMA synchronous=NORMAL")
+                await db.executescript(self.SCHEMA)
+                await self.migrate(db)
+                await self.import_json(db)
+                self.db = db
+        return self.db
+
+    async def migrate(self, db):
+        """Add columns that were introduced after the tables were created"""
+        added = (
+            ("tickets", "transcript_path", "TEXT"),
+            ("tickets", "first_claimed_at", "REAL"),
+            ("tickets", "unclaimed_at", "REAL"),
+            ("tickets", "search_indexed_at", "REAL"),
+            ("rating_messages", "channel_id", "INTEGER"),
+            ("rating_messages", "reconciled_at", "REAL")
+        )
+        for table, column, column_type in added:
+            async with db.execute(f"PRAGMA table_info({table})") as cursor:
+                columns = {row["name"] for row in await cursor.fetchall()}
+            if column not in columns:
+                await db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+        await db.commit()
+
+    async def import_json(self, db):
+        """One-shot import of ticket_info.json and rating_messages.json"""
+        async with db.execute("SELECT 1 FROM meta WHERE key = 'json_imported'") as cursor:
+            if await cursor.fetchone():
+                return
+
+        tickets = []
+        if os.path.exists(TICKET_INFO_FILE):
+            with open(TICKET_INFO_FILE, "r") as f:
+                for channel_id, creator_id in json.load(f).items():
+                    # The channel snowflake carries the creation time of the ticket
+                    opened_at = discord.utils.snowflake_time(int(channel_id)).timestamp()
+                    tickets.append((int(channel_id), int(creator_id), opened_at))
+
+        rating_messages = []
+        if os.path.exists(RATING_MESSAGES_FILE):
+            with open(RATING_MESSAGES_FILE, "r") as f:
+                for message_id, data in json.load(f).items():
+                    created_at = discord.utils.snowflake_time(int(message_id)).timestamp()
+                    rating_messages.append((
+                        int(message_id), int(data["user_id"]), data.get("guild_id"), data.get("ticket_name"), created_at
+                    ))
+
+        await db.executemany(
+            "INSERT OR IGNORE INTO tickets (channel_id, creator_id, opened_at) VALUES (?, ?, ?)", tickets
+        )
+        await db.executemany(
+            "INSERT OR IGNORE INTO rating_messages (message_id, user_id, guild_id, ticket_name, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            rating_messages
+        )
+        await db.execute("INSERT INTO meta (key, value) VALUES ('json_imported', ?)", (datetime.now().isoformat(),))
+        await db.commit()
+        if tickets or rating_messages:
+            print(f"Imported {len(tickets)} tickets and {len(rating_messages)} rating requests into {self.path}")
+
+    async def fetch_ticket(self, channel_id):
+        db = await self.connect()
+        async with db.execute(f"SELECT {self.COLUMNS} FROM tickets WHERE channel_id = ?", (channel_id,)) as cursor:
+            row = await cursor.fetchone()
+        ticket = dict(row) if row else None
+        self.cache[channel_id] = ticket
+        return ticket
+
+    async def get(self, channel_id):
+        """Ticket of a channel, O(1) once cached"""
+        if channel_id in self.cache:
+            return self.cache[channel_id]
+        return await self.fetch_ticket(channel_id)
+
+    async def create(self, guild_id, channel_id, creator_id, name):
+        db = await self.connect()
+        await db.execute(
+            "INSERT INTO tickets (guild_id, channel_id, creator_id, name, opened_at) VALUES (?, ?, ?, ?, ?)",
+            (guild_id, channel_id, creator_id, name, time.time())
+        )
+        await db.commit()
+        return await self.fetch_ticket(channel_id)
+
+    async def get_open_tickets(self):
+        db = await self.connect()
+        async with db.execute(
+            "SELECT guild_id, creator_id, channel_id, status, claimed_by, opened_at FROM tickets WHERE status != 'closed'"
+        ) as cursor:
+            return [dict(row) for row in await cursor.fetchall()]
+
+    async def close_stale(self, channel_ids):
+        """Close the open tickets of channels that no longer exist"""
+        db = await self.connect()
+        await db.executemany(
+            "UPDATE tickets SET status = 'closed', closed_at = ? WHERE channel_id = ? AND status != 'closed'",
+            [(time.time(), channel_id) for channel_id in channel_ids]
+        )
+        await db.commit()
+        for channel_id in channel_ids:
+            self.cache.pop(channel_id, None)
+
+    async def set_staff_available(self, staff_id, available):
+        db = await self.connect()
+        await db.execute(
+            "INSERT OR REPLACE INTO staff_availability (staff_id, available, updated_at) VALUES (?, ?, ?)",
+            (staff_id, int(available), time.time())
+        )
+        await db.commit()
+
+    async def get_available_staff(self):
+        db = await self.connect()
+        async with db.execute("SELECT staff_id FROM staff_availability WHERE available = 1") as cursor:
+            return [row["staff_id"] for row in await cursor.fetchall()]
+
+    async def update(self, channel_id, assignments, condition, values):
+        """Apply a conditional UPDATE and return the updated ticket, or None if nothing matched"""
+        db = await self.connect()
+        cursor = await db.execute(
+            f"UPDATE tickets SET {assignments} WHERE channel_id = ? AND {condition}",
+            (*values, channel_id)
+        )
+        await db.commit()
+        if cursor.rowcount == 0:
+            return None
+        return await self.fetch_ticket(channel_id)
+
+    async def claim(self, channel_id, staff_id):
+        now = time.time()
+        return await self.update(
+            channel_id,
+            "status = 'claimed', claimed_by = ?, claimed_at = ?, first_claimed_at = COALESCE(first_claimed_at, ?)",
+            "status != 'closed'",
+            (staff_id, now, now)
+        )
+
+    async def unclaim(self, channel_id):
+        return await self.update(
+            channel_id, "status = 'open', claimed_by = NULL, claimed_at = NULL, unclaimed_at = ?", "status = 'claimed'", (time.time(),)
+        )
+
+    async def close(self, channel_id):
+        """Close a ticket; only the first of several concurrent calls gets the ticket back
+
+        The others get None. False means the channel has no ticket row at all.
+        """
+        ticket = await self.update(channel_id, "status = 'closed', closed_at = ?", "status != 'closed'", (time.time(),))
+        self.cache.pop(channel_id, None)
+        if ticket is None:
+            async with self.db.execute("SELECT 1 FROM tickets WHERE channel_id = ?", (channel_id,)) as cursor:
+                if await cursor.fetchone() is None:
+                    return False
+        return ticket
+
+    async def add_sla_sample(self, day, metric, staff_id, hour, seconds):
+        """Count a duration into the staff and hour-of-day histograms of a day"""
+        db = await self.connect()
+        bucket = sla_bucket(seconds)
+        await db.executemany(
+            "INSERT INTO sla_histograms (day, metric, dimension, key, bucket, count) VALUES (?, ?, ?, ?, ?, 1) "
+            "ON CONFLICT (metric, dimension, day, key, bucket) DO UPDATE SET count = count + 1",
+            [(day, metric, "staff", staff_id, bucket), (day, metric, "hour", hour, bucket)]
+        )
+        await db.commit()
+
+    async def get_sla_histograms(self, metric, dimension, since_day):
+        """{key: {bucket: count}} summed over the days since since_day"""
+        db = await self.connect()
+        histograms = {}
+        async with db.execute(
+            "SELECT key, bucket, SUM(count) FROM sla_histograms WHERE metric = ? AND dimension = ? AND day >= ? "
+            "GROUP BY key, bucket",
+            (metric, dimension, since_day)
+        ) as cursor:
+            async for key, bucket, count in cursor:
+                histograms.setdefault(key, {})[bucket] = count
+        return histograms
+
+    async def prune_sla_histograms(self, before_day):
+        db = await self.connect()
+        cursor = await db.execute("DELETE FROM sla_histograms WHERE day < ?", (before_day,))
+        await db.commit()
+        return cursor.rowcount
+
+    async def set_transcript(self, channel_id, path, indexed=True):
+        db = await self.connect()
+        await db.execute(
+            "UPDATE tickets SET transcript_path = ?, search_indexed_at = ? WHERE channel_id = ?",
+            (path, time.time() if indexed else None, channel_id)
+        )
+        await db.commit()
+        self.cache.pop(channel_id, None)
+
+    async def add_search_entries(self, channel_id, entries):
+        """Index a page of transcript entries
+        
+        Nothing is committed here. The connection is shared, so the page becomes durable
+        with whichever commit comes next (another coroutine's or set_transcript()), which
+        may be before the ticket records its transcript path. reindex_transcript() deletes
+        the indexed messages of a channel first, so indexing it again never duplicates them.
+        """
+        db = await self.connect()
+        await db.executemany(
+            "INSERT INTO transcript_search (content, author, channel_id, message_id, created_at) VALUES (?, ?, ?, ?, ?)",
+            [
+                (entry["content"], entry["author"], channel_id, entry["id"], entry["created_at"])
+                for entry in entries if entry.get("content")
+            ]
+        )
+
+    async def get_unindexed_transcripts(self):
+        db = await self.connect()
+        async with db.execute(
+            "SELECT channel_id, transcript_path FROM tickets WHERE transcript_path IS NOT NULL AND search_indexed_at IS NULL"
+        ) as cursor:
+            return [dict(row) for row in await cursor.fetchall()]
+
+    async def reindex_transcript(self, channel_id, path, entries):
+        """Replace the indexed messages of a transcript, e.g. after an interrupted close"""
+        db = await self.connect()
+        await db.execute("DELETE FROM transcript_search WHERE channel_id = ?", (channel_id,))
+        await self.add_search_entries(channel_id, entries)
+        await self.set_transcript(channel_id, path)
+
+    async def search_transcripts(self, text, limit=SEARCH_RESULTS):
+        """Best matching message of each of the `limit` best matching tickets, by bm25 rank"""
+        query = search_query(text)
+        if not query:
+            # An empty MATCH is an FTS5 syntax error
+            return []
+        db = await self.connect()
+        results = {}
+        async with db.execute(
+            "SELECT channel_id, message_id, author, created_at, "
+            f"snippet(transcript_search, 0, '**', '**', '…', {SEARCH_SNIPPET_TOKENS}) AS snippet "
+            "FROM transcript_search WHERE transcript_search MATCH ? ORDER BY rank LIMIT ?",
+            (query, limit * 5)
+        ) as cursor:
+            async for row in cursor:
+                if row["channel_id"] not in results:
+                    results[row["channel_id"]] = dict(row)
+                    if len(results) >= limit:
+                        break
+        if results:
+            placeholders = ", ".join("?" for _ in results)
+            async with db.execute(
+                f"SELECT channel_id, name, creator_id FROM tickets WHERE channel_id IN ({placeholders})", tuple(results)
+            ) as cursor:
+                async for row in cursor:
+                    results[row["channel_id"]].update(name=row["name"], creator_id=row["creator_id"])
+        return list(results.values())
+
+    async def add_rating_message(self, message_id, user_id, guild_id, ticket_name, channel_id=None):
+        db = await self.connect()
+        await db.execute(
+            "INSERT OR REPLACE INTO rating_messages (message_id, user_id, guild_id, ticket_name, created_at, channel_id) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (message_id, user_id, guild_id, ticket_name, time.time(), channel_id)
+        )
+        await db.commit()
+
+    async def get_unreconciled_rating_messages(self):
+        db = await self.connect()
+        async with db.execute(
+            "SELECT message_id, user_id, guild_id, ticket_name, channel_id FROM rating_messages "
+            "WHERE reconciled_at IS NULL"
+        ) as cursor:
+            return [dict(row) for row in await cursor.fetchall()]
+
+    async def mark_reconciled(self, message_ids):
+        """Rating requests whose message shows its final state and never needs another edit"""
+        db = await self.connect()
+        now = time.time()
+        await db.executemany(
+            "UPDATE rating_messages SET reconciled_at = ? WHERE message_id = ?",
+            [(now, int(message_id)) for message_id in message_ids]
+        )
+        await db.commit()
+
+    async def prune_rating_messages(self, before):
+        db = await self.connect()
+        cursor = await db.execute("DELETE FROM rating_messages WHERE created_at < ?", (before,))
+        await db.commit()
+        return cursor.rowcount
+
+    async def close_db(self):
+        if self.db is not None:
+            await self.db.close()
+            self.db = None
+
 # Persistent Views for use after a restart
 class TicketCreateView(discord.ui.View):
     def __init__(self):
@@ -22,51 +749,82 @@ class TicketCreateView(discord.ui.View):
         cog = interaction.client.get_cog("TicketSystem")
         if cog and not cog.is_open():
             hours = cog.get_opening_hours_text()
-            container = Container()
-            banner = discord.ui.MediaGallery()
-            banner.add_item("https://media.discordapp.net/attachments/1420436338284695657/1428764647779205270/support-times.png?ex=68f3b045&is=68f25ec5&hm=244c1fcb00a51a17e3de1e7b290493f225778eb073b0811255386eeacff5376a&=&format=webp&quality=lossless&width=1208&height=261")
-            container.add_item(banner)
-            container.add_text("## ⏰ Support Currently Closed")
-            container.add_separator(spacing=SeparatorSpacingSize.small)
-            container.add_text(f"Our Support is currently closed.\n\n{hours}\n-# Please try again during our opening hours.")
+            container = render("support_closed", hours=hours)
             view = discord.ui.View(container, timeout=None)
             await interaction.response.send_message(view=view, ephemeral=True)
             return
 
+        # Repeated clicks are answered from the index and the in-flight set, before any REST call
+        user_id = interaction.user.id
+        if cog:
+            if user_id in cog.opening_users:
+                await interaction.response.send_message("Your ticket is already being created.", ephemeral=True)
+                return
+            open_channels = cog.open_tickets.get(user_id, [])
+            if len(open_channels) >= MAX_OPEN_TICKETS_PER_USER:
+                links = ", ".join(f"<#{channel_id}>" for channel_id in open_channels)
+                await interaction.response.send_message(f"You already have an open ticket: {links}", ephemeral=True)
+                return
+            cog.opening_users.add(user_id)
+
+        try:
+            await self.open_ticket(interaction, cog)
+        finally:
+            if cog:
+                cog.opening_users.discard(user_id)
+
+    async def open_ticket(self, interaction, cog):
         await interaction.response.send_message('Creating ticket...', ephemeral=True)
 
-        ticket_channel = await interaction.guild.create_text_channel(
-            name=f'ticket-{interaction.user.name}',
-            category=interaction.guild.get_channel(1421784692969177200)
-        )
+        timings = {}
+        started = step = time.perf_counter()
 
-        await ticket_channel.set_permissions(interaction.user, read_messages=True, send_messages=True)
-        await ticket_channel.set_permissions(interaction.guild.default_role, read_messages=False, send_messages=False)
+        # The category overwrites plus the ticket's own ones, set in the same request
+        # that renames a pooled channel or creates a new one
+        category = interaction.guild.get_channel(TICKET_CATEGORY_ID)
+        overwrites = dict(category.overwrites) if category else {}
+        overwrites[interaction.guild.default_role] = discord.PermissionOverwrite(read_messages=False, send_messages=False)
+        overwrites[interaction.user] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
+        name = f'ticket-{interaction.user.name}'
 
-        container = Container()
-        banner = discord.ui.MediaGallery()
-        banner.add_item("https://media.discordapp.net/attachments/1420436338284695657/1428764647300927600/support-tickets.png?ex=68f3b045&is=68f25ec5&hm=515197dd3b455268602d79e7519f0973a31332b25200dd87dc2e1b7239cbe1ac&=&format=webp&quality=lossless&width=1208&height=261")
-        container.add_item(banner)
-        container.add_text("## Welcome to Your Ticket")
-        container.add_separator(spacing=SeparatorSpacingSize.small)
-        container.add_text("A friendly and helpful team member will shortly take care of your request with patience and attention. We want to ensure you receive the best possible support and are always here to help you and answer your questions. Thank you for your trust – we look forward to helping you!")
+        ticket_channel = await cog.take_pool_channel(interaction.guild, name, overwrites) if cog else None
+        if ticket_channel:
+            timings["pool"] = time.perf_counter() - step
+        else:
+            ticket_channel = await interaction.guild.create_text_channel(
+                name=name,
+                category=category,
+                overwrites=overwrites
+            )
+            timings["channel"] = time.perf_counter() - step
 
-        view = discord.ui.View(container, timeout=None)
-        await ticket_channel.send(view=view)
-        await ticket_channel.send(view=TicketSystemView())
+            # Welcome panel and ticket controls go out as one message
+            step = time.perf_counter()
+            await ticket_channel.send(view=TicketSystemView(render("ticket_welcome")))
+            timings["panel"] = time.perf_counter() - step
 
         try:
-            ticket_info_path = "data/ticket_info.json"
-            ticket_info = {}
-            if os.path.exists(ticket_info_path):
-                with open(ticket_info_path, "r") as f:
-                    ticket_info = json.load(f)
-
-            ticket_info[str(ticket_channel.id)] = interaction.user.id
+            step = time.perf_counter()
+            if cog:
+                ticket = await cog.store.create(interaction.guild.id, ticket_channel.id, interaction.user.id, ticket_channel.name)
+                # Indexed only once the row exists; opening_users keeps a second click out until then
+                cog.open_tickets.setdefault(interaction.user.id, []).append(ticket_channel.id)
+                cog.dispatcher.add_ticket(ticket_channel.id, ticket["opened_at"])
+                cog.schedule_dispatch()
+            timings["store"] = time.perf_counter() - step
+        except Exception as e:
+            print(f"Error saving ticket information: {e}")
 
-            with open(ticket_info_path, "w") as f:
-                json.dump(ticket_info, f, indent=2)
+        step = time.perf_counter()
+        try:
+            await interaction.edit_original_response(content=f"Your ticket has been created: {ticket_channel.mention}")
+        except discord.HTTPException as e:
+            print(f"Error answering ticket creation: {e}")
+        timings["answer"] = time.perf_counter() - step
+        timings["open"] = time.perf_counter() - started
 
+        # Side effects that the user does not wait for
+        async def send_dm():
             embed = discord.Embed(
                 title="Ticket Created",
                 description=f"Your ticket has been successfully created: {ticket_channel.mention}",
@@ -76,8 +834,26 @@ class TicketCreateView(discord.ui.View):
                 await interaction.user.send(embed=embed)
             except discord.Forbidden:
                 print(f"Could not send DM to user {interaction.user.id}")
-        except Exception as e:
-            print(f"Error saving ticket information: {e}")
+
+        step = time.perf_counter()
+        follow_ups = [send_dm()]
+        if cog:
+            follow_ups.append(cog.log_ticket_action(
+                guild_id=interaction.guild.id,
+                action="Ticket opened",
+                ticket_name=ticket_channel.name,
+                user=interaction.user
+            ))
+        for result in await asyncio.gather(*follow_ups, return_exceptions=True):
+            if isinstance(result, Exception):
+                print(f"Error in ticket follow-up: {result}")
+        timings["follow_ups"] = time.perf_counter() - step
+
+        print(
+            f"Ticket {ticket_channel.name} opened in {timings['open'] * 1000:.0f} ms ("
+            + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in timings.items() if name != "open")
+            + ")"
+        )
 
     @discord.ui.button(label='⭐ Rating Average', style=discord.ButtonStyle.secondary, row=1, custom_id="rating_avg")
     async def show_average(self, button: discord.ui.Button, interaction: discord.Interaction):
@@ -89,25 +865,40 @@ class TicketCreateView(discord.ui.View):
 
 
 class TicketSystemView(discord.ui.View):
-    def __init__(self):
+    def __init__(self, *items):
         super().__init__(timeout=None)
+        # Extra items (e.g. the welcome container) are shown above the ticket buttons
+        if items:
+            buttons = list(self.children)
+            self.clear_items()
+            for item in (*items, *buttons):
+                self.add_item(item)
 
     @discord.ui.button(label='❌ Close the Ticket', style=discord.ButtonStyle.danger, custom_id="close_ticket")
     async def close_ticket(self, button: discord.ui.Button, interaction: discord.Interaction):
+        creator_id = None
+        ticket = False
+        cog = interaction.client.get_cog("TicketSystem")
+        if cog:
+            try:
+                ticket = await cog.store.close(interaction.channel.id)
+            except Exception as e:
+                print(f"Error closing ticket: {e}")
+
+        # Only the first close gets the ticket back; a second click must not send another
+        # rating request or archive and delete the channel a second time. A channel
+        # without a ticket row (False) is still archived and deleted.
+        if ticket is None:
+            await interaction.response.send_message('This ticket is already being closed!', ephemeral=True)
+            return
         await interaction.response.send_message('Closing ticket!', ephemeral=True)
 
-        creator_id = None
-        ticket_info_path = "data/ticket_info.json"
         try:
-            if os.path.exists(ticket_info_path):
-                with open(ticket_info_path, "r") as f:
-                    ticket_info = json.load(f)
-                    creator_id = ticket_info.get(str(interaction.channel.id))
-
-                    if str(interaction.channel.id) in ticket_info:
-                        del ticket_info[str(interaction.channel.id)]
-                        with open(ticket_info_path, "w") as f:
-                            json.dump(ticket_info, f, indent=2)
+            if ticket:
+                creator_id = ticket["creator_id"]
+                cog.forget_open_ticket(creator_id, interaction.channel.id)
+                cog.track_close(ticket)
+                await cog.record_sla(ticket, "handle")
         except Exception as e:
             print(f"Error retrieving ticket information: {e}")
 
@@ -120,19 +911,12 @@ class TicketSystemView(discord.ui.View):
                     print(f"Error fetching user: {e}")
 
             if user:
-                cog = interaction.client.get_cog("TicketSystem")
                 if cog:
                     try:
                         ticket_name = interaction.channel.name
                         guild_id = interaction.guild.id
 
-                        container = Container()
-                        banner = discord.ui.MediaGallery()
-                        banner.add_item("https://media.discordapp.net/attachments/1420436338284695657/1428764646973898773/support-rating.png?ex=68f3b045&is=68f25ec5&hm=4db9d39e0ad0c37f5ba59acbf0539a2e9e9249ee0e8ba0164f4cd5b38ff06012&=&format=webp&quality=lossless&width=1208&height=261")
-                        container.add_item(banner)
-                        container.add_text("# Ticket Rating")
-                        container.add_separator(spacing=SeparatorSpacingSize.small)
-                        container.add_text(f"Your ticket **{ticket_name}** has been closed.\nHow would you rate our support?")
+                        container = render("ticket_rating", ticket_name=ticket_name)
                         
                         view = discord.ui.View(container, timeout=None)
                         rating_view = RatingView(ticket_name=ticket_name, guild_id=guild_id)
@@ -141,20 +925,9 @@ class TicketSystemView(discord.ui.View):
                             await user.send(view=view)
                             message = await user.send(view=rating_view)
 
-                            rating_messages_path = "data/rating_messages.json"
-                            rating_data = {}
-                            if os.path.exists(rating_messages_path):
-                                with open(rating_messages_path, "r") as f:
-                                    rating_data = json.load(f)
-
-                            rating_data[str(message.id)] = {
-                                "user_id": creator_id,
-                                "guild_id": interaction.guild.id,
-                                "ticket_name": ticket_name
-                            }
-
-                            with open(rating_messages_path, "w") as f:
-                                json.dump(rating_data, f, indent=2)
+                            await cog.store.add_rating_message(
+                                message.id, creator_id, guild_id, ticket_name, channel_id=message.channel.id
+                            )
 
                             await cog.log_ticket_action(
                                 guild_id=guild_id,
@@ -174,6 +947,13 @@ class TicketSystemView(discord.ui.View):
             else:
                 print(f"Could not find user with ID {creator_id}")
 
+        if cog:
+            try:
+                # Only reading the history holds up the delete, compressing and writing finish in the background
+                await cog.archive_transcript(interaction.channel)
+            except Exception as e:
+                print(f"Error archiving transcript: {e}")
+
         await interaction.channel.delete()
 
     @discord.ui.button(label='🔒 Claim Ticket', style=discord.ButtonStyle.secondary, custom_id="claim_ticket")
@@ -183,40 +963,13 @@ class TicketSystemView(discord.ui.View):
             return
 
         await interaction.response.send_message('Ticket has been claimed!', ephemeral=True)
-        await interaction.channel.set_permissions(interaction.user, read_messages=True, send_messages=True)
-
-        container = Container()
-        banner = discord.ui.MediaGallery()
-        banner.add_item("https://media.discordapp.net/attachments/1420436338284695657/1428764647300927600/support-tickets.png?ex=68f501c5&is=68f3b045&hm=59aea2e4d0f6f5cf4b1c44beadef1be9fd71533bfc4a96dbbf5b8ddfdfca5bdd&=&format=webp&quality=lossless&width=1730&height=374")
-        container.add_item(banner)
-        container.add_text("# Ticket Claimed")
-        container.add_separator(spacing=SeparatorSpacingSize.small)
-        container.add_text(f"{interaction.user.mention} has claimed the ticket and will assist you shortly.")
-
-        view = discord.ui.View(container, timeout=None)
-        await interaction.channel.send(view=view)
-
-        try:
-            ticket_info_path = "data/ticket_info.json"
-            if os.path.exists(ticket_info_path):
-                with open(ticket_info_path, "r") as f:
-                    ticket_info = json.load(f)
-                    creator_id = ticket_info.get(str(interaction.channel.id))
-
-                    if creator_id:
-                        user = interaction.client.get_user(int(creator_id))
-                        if user:
-                            dm_embed = discord.Embed(
-                                title="Ticket Update",
-                                description=f"Your ticket **{interaction.channel.name}** has been claimed by {interaction.user.mention}.",
-                                color=discord.Color.green()
-                            )
-                            try:
-                                await user.send(embed=dm_embed)
-                            except discord.Forbidden:
-                                print(f"Could not send DM to user {creator_id} - DMs disabled")
-        except Exception as e:
-            print(f"Error sending claim notification: {e}")
+        cog = interaction.client.get_cog("TicketSystem")
+        if cog:
+            previous = await cog.store.get(interaction.channel.id)
+            ticket = await cog.store.claim(interaction.channel.id, interaction.user.id)
+            if ticket:
+                cog.track_claim(previous, ticket)
+            await cog.announce_claim(interaction.channel, interaction.user, ticket)
 
     @discord.ui.button(label='🔓 Release Ticket', style=discord.ButtonStyle.secondary, custom_id="unclaim_ticket")
     async def unclaim_ticket(self, button: discord.ui.Button, interaction: discord.Interaction):
@@ -225,14 +978,14 @@ class TicketSystemView(discord.ui.View):
             return
 
         await interaction.response.send_message('Ticket has been released!', ephemeral=True)
+        cog = interaction.client.get_cog("TicketSystem")
+        if cog:
+            previous = await cog.store.get(interaction.channel.id)
+            ticket = await cog.store.unclaim(interaction.channel.id)
+            if ticket:
+                cog.track_release(previous, ticket)
 
-        container = Container()
-        banner = discord.ui.MediaGallery()
-        banner.add_item("https://media.discordapp.net/attachments/1420436338284695657/1428764647300927600/support-tickets.png?ex=68f501c5&is=68f3b045&hm=59aea2e4d0f6f5cf4b1c44beadef1be9fd71533bfc4a96dbbf5b8ddfdfca5bdd&=&format=webp&quality=lossless&width=1730&height=374")
-        container.add_item(banner)
-        container.add_text("# Ticket Released")
-        container.add_separator(spacing=SeparatorSpacingSize.small)
-        container.add_text(f"{interaction.user.mention} has released the ticket.")
+        container = render("ticket_released", staff=interaction.user.mention)
 
         view = discord.ui.View(container, timeout=None)
         await interaction.channel.send(view=view)
@@ -269,7 +1022,10 @@ class RatingSelect(discord.ui.Select):
                 await interaction.response.send_message(embed=embed, ephemeral=True)
                 return
 
-            await cog.add_rating(rating)
+            # Checking and recording happen in one step, a second concurrent submission is rejected
+            if not cog.submit_rating(message_id, rating):
+                await interaction.response.send_message("Your rating has already been submitted.", ephemeral=True)
+                return
 
             stars = "⭐" * rating
             embed = discord.Embed(
@@ -299,7 +1055,7 @@ class RatingSelect(discord.ui.Select):
             try:
                 disabled_view = RatingViewDisabled(rating=rating, avg=avg, count=cog.ratings.get('count', 0))
                 await interaction.message.edit(view=disabled_view)
-                await cog.mark_rating_as_submitted(interaction.message.id, rating)
+                await cog.store.mark_reconciled([interaction.message.id])
                 await interaction.response.send_message(embed=embed, ephemeral=True)
             except Exception as e:
                 print(f"Error updating rating message: {e}")
@@ -339,33 +1095,75 @@ class RatingViewDisabled(discord.ui.View):
 
 
 class TicketSystem(commands.Cog):
+    ticket = discord.SlashCommandGroup("ticket", "Ticket system")
+
     def __init__(self, bot):
         self.bot = bot
         self.ratings = {}
         self.submitted_ratings = {}
         self.load_ratings()
         self.load_submitted_ratings()
+        self.response_cache = SimpleMemoryCache(namespace="tickets", plugins=[HitMissRatioPlugin()])
+        self.rating_cache_version = 0
+        self.store = TicketStore(TICKET_DB_FILE)
+        self.transcript_tasks = set()
+        self.closed = False
+        self.reconcile_task = None
+        self.search_index_task = None
+        self.channel_pool = []
+        self.open_tickets = {}
+        self.opening_users = set()
+        self.open_tickets_loaded = False
+        self.dispatcher = ClaimDispatcher()
+        self.dispatch_task = None
+        self.log_queue = asyncio.Queue()
+        self.log_task = None
+        self.log_metrics = {"messages": 0, "entries": 0, "retries": 0, "dropped": 0, "flush_seconds": 0.0, "last_flush_seconds": 0.0}
+        self.pool_metrics = {"hits": 0, "misses": 0, "refills": 0, "refill_seconds": 0.0, "last_refill_seconds": 0.0}
 
         self.ticket_create_view = None
         self.ticket_system_view = None
         self.rating_view = None
         
-        self.timezone = pytz.timezone('Europe/Berlin')
+        self.timezone = pytz.timezone(OPENING_TIMEZONE)
         self.opening_hours_channel_id = 1428745792063012966
         self.opening_hours_message_id = None
+        self.opening_hours_message = None
+        self.opening_hours_task = None
+        self.schedule = OpeningSchedule(OPENING_HOURS, HOLIDAYS, self.timezone)
+        self.support_open = None
+        self.next_transition = None
+        self.refresh_open_state()
         
+    def create_empty_ratings(self):
+        return {"total": 0, "count": 0, "histogram": [0, 0, 0, 0, 0], "daily": {}}
+
     def load_ratings(self):
         try:
             ratings_path = "data/ratings.json"
             if os.path.exists(ratings_path):
                 with open(ratings_path, "r") as f:
                     self.ratings = json.load(f)
+                if "ratings" in self.ratings:
+                    self.migrate_ratings()
             else:
-                self.ratings = {"total": 0, "count": 0, "ratings": []}
+                self.ratings = self.create_empty_ratings()
                 self.save_ratings()
         except Exception as e:
             print(f"Error loading ratings: {e}")
-            self.ratings = {"total": 0, "count": 0, "ratings": []}
+            self.ratings = self.create_empty_ratings()
+
+    def migrate_ratings(self):
+        """Convert the old list of every rating into the histogram format"""
+        ratings = self.create_empty_ratings()
+        for rating in self.ratings.get("ratings", []):
+            if rating in (1, 2, 3, 4, 5):
+                ratings["histogram"][rating - 1] += 1
+                ratings["total"] += rating
+                ratings["count"] += 1
+        self.ratings = ratings
+        self.save_ratings()
+        print(f"Migrated {ratings['count']} ratings to the histogram format")
 
     def save_ratings(self):
         try:
@@ -396,51 +1194,68 @@ class TicketSystem(commands.Cog):
         except Exception as e:
             print(f"Error saving submitted ratings: {e}")
 
-    async def mark_rating_as_submitted(self, message_id, rating):
+    def submit_rating(self, message_id, rating):
+        """Record the rating of a rating request once; False if it was rated already
+
+        There is no await between the check and the update, so concurrent callbacks
+        cannot both pass the check.
+        """
         message_id = str(message_id)
+        if message_id in self.submitted_ratings or not self.add_rating(rating):
+            return False
         self.submitted_ratings[message_id] = rating
         self.save_submitted_ratings()
+        return True
 
     def get_average_rating(self):
         if self.ratings.get("count", 0) > 0:
             return self.ratings.get("total", 0) / self.ratings.get("count", 1)
         return 0.0
 
-    async def add_rating(self, rating):
+    def add_rating(self, rating):
+        """O(1) update of sum, count and the all-time and daily histograms"""
         if not isinstance(rating, int) or rating < 1 or rating > 5:
             print(f"Invalid rating: {rating}")
             return False
 
-        if "total" not in self.ratings:
-            self.ratings["total"] = 0
-        if "count" not in self.ratings:
-            self.ratings["count"] = 0
-        if "ratings" not in self.ratings:
-            self.ratings["ratings"] = []
-
+        today = datetime.now(self.timezone).strftime("%Y-%m-%d")
         self.ratings["total"] += rating
         self.ratings["count"] += 1
-        self.ratings["ratings"].append(rating)
+        self.ratings["histogram"][rating - 1] += 1
+        self.ratings["daily"].setdefault(today, [0, 0, 0, 0, 0])[rating - 1] += 1
+
+        # Daily buckets are only needed for the rolling window
+        cutoff = (datetime.now(self.timezone) - timedelta(days=RATING_WINDOW_DAYS)).strftime("%Y-%m-%d")
+        for day in [day for day in self.ratings["daily"] if day < cutoff]:
+            del self.ratings["daily"][day]
 
         self.save_ratings()
+        self.rating_cache_version += 1
         return True
 
-    def is_open(self):
+    def get_recent_histogram(self, days=RATING_WINDOW_DAYS):
+        """Five-bucket histogram of the last `days` days"""
+        cutoff = (datetime.now(self.timezone) - timedelta(days=days)).strftime("%Y-%m-%d")
+        histogram = [0, 0, 0, 0, 0]
+        for day, counts in self.ratings["daily"].items():
+            if day >= cutoff:
+                for index, count in enumerate(counts):
+                    histogram[index] += count
+        return histogram
+
+    def refresh_open_state(self):
+        """Precompute the open state, the next transition and the hours text; True if the state changed"""
         now = datetime.now(self.timezone)
-        current_hour = now.hour
-        is_weekend = now.weekday() >= 5
-        
-        if is_weekend:
-            return 8 <= current_hour < 20
-        else:
-            return 8 <= current_hour < 18
+        was_open = self.support_open
+        self.support_open, self.next_transition = self.schedule.state(now)
+        self.opening_hours_text = self.schedule.text(now.date())
+        return was_open != self.support_open
+
+    def is_open(self):
+        return self.support_open
 
     def get_opening_hours_text(self):
-        return (
-            "**📅 Opening Hours:**\n"
-            "**Monday - Friday:** 8:00 AM - 6:00 PM\n"
-            "**Saturday - Sunday:** 8:00 AM - 8:00 PM"
-        )
+        return self.opening_hours_text
 
     def get_status_embed(self):
         is_open = self.is_open()
@@ -467,26 +1282,55 @@ class TicketSystem(commands.Cog):
             value=self.get_opening_hours_text(),
             inline=False
         )
+
+        # Discord renders the relative time itself, so it stays current without edits
+        if self.next_transition:
+            timestamp = int(self.next_transition.timestamp())
+            embed.add_field(
+                name="Closes" if is_open else "Opens",
+                value=f"<t:{timestamp}:F> (<t:{timestamp}:R>)",
+                inline=False
+            )
         
         embed.set_footer(text="🚀oppro-network.de™ | Last updated")
         
         return embed
 
-    @tasks.loop(minutes=5)
+    async def run_opening_hours_scheduler(self):
+        """Sleep until the next open/close transition and edit the status message only then"""
+        while True:
+            try:
+                delay = OPENING_HOURS_MAX_SLEEP
+                if self.next_transition:
+                    delay = min(delay, (self.next_transition - datetime.now(self.timezone)).total_seconds())
+                await asyncio.sleep(max(delay, 0))
+                if self.refresh_open_state():
+                    print(f"Support is now {'open' if self.support_open else 'closed'}, next change at {self.next_transition}")
+                    await self.update_opening_hours_message()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in opening hours scheduler: {e}")
+                await asyncio.sleep(60)
+
     async def update_opening_hours_message(self):
         try:
             if not self.opening_hours_message_id:
                 return
-                
-            channel = self.bot.get_channel(self.opening_hours_channel_id)
-            if not channel:
-                return
-            
+
+            # The message object is kept after the first edit; before that a partial
+            # message edits by ID without fetching it
+            message = self.opening_hours_message
+            if message is None:
+                channel = self.bot.get_channel(self.opening_hours_channel_id)
+                if not channel:
+                    return
+                message = channel.get_partial_message(self.opening_hours_message_id)
+
             try:
-                message = await channel.fetch_message(self.opening_hours_message_id)
-                embed = self.get_status_embed()
-                await message.edit(embed=embed)
+                self.opening_hours_message = await message.edit(embed=self.get_status_embed())
             except discord.NotFound:
+                self.opening_hours_message = None
                 await self.create_opening_hours_message()
         except Exception as e:
             print(f"Error updating opening hours message: {e}")
@@ -508,7 +1352,7 @@ class TicketSystem(commands.Cog):
                             print(f"Found existing opening hours message: {message.id}")
                             # Update the message with current status
                             new_embed = self.get_status_embed()
-                            await message.edit(embed=new_embed)
+                            self.opening_hours_message = await message.edit(embed=new_embed)
                             # Save the ID
                             opening_hours_path = "data/opening_hours.json"
                             with open(opening_hours_path, "w") as f:
@@ -521,6 +1365,7 @@ class TicketSystem(commands.Cog):
             embed = self.get_status_embed()
             message = await channel.send(embed=embed)
             self.opening_hours_message_id = message.id
+            self.opening_hours_message = message
             print(f"Created new opening hours message: {message.id}")
             
             opening_hours_path = "data/opening_hours.json"
@@ -563,7 +1408,19 @@ class TicketSystem(commands.Cog):
             self.bot.add_view(self.rating_view)
             self.bot.add_view(RatingViewDisabled())
 
-            await self.check_and_update_rating_messages()
+            if self.log_task is None:
+                self.log_task = asyncio.create_task(self.run_log_writer())
+
+            if not self.open_tickets_loaded:
+                await self.load_open_tickets()
+                cutoff = (datetime.now(self.timezone) - timedelta(days=SLA_RETENTION_DAYS)).strftime("%Y-%m-%d")
+                await self.store.prune_sla_histograms(cutoff)
+
+            # Runs in the background so startup does not wait for old rating requests
+            if self.reconcile_task is None:
+                self.reconcile_task = asyncio.create_task(self.reconcile_rating_messages())
+            if self.search_index_task is None:
+                self.search_index_task = asyncio.create_task(self.index_archived_transcripts())
 
             message_info_path = "data/message_info.json"
             if os.path.exists(message_info_path):
@@ -591,22 +1448,20 @@ class TicketSystem(commands.Cog):
                 if default_channel:
                     await self.create_ticket_message(default_channel)
 
-            self.load_opening_hours_message_id()
-            if self.opening_hours_message_id:
-                try:
-                    channel = self.bot.get_channel(self.opening_hours_channel_id)
-                    if channel:
-                        message = await channel.fetch_message(self.opening_hours_message_id)
-                        embed = self.get_status_embed()
-                        await message.edit(embed=embed)
-                        print(f"Opening hours message updated: {self.opening_hours_message_id}")
-                except discord.NotFound:
+            # Brings the message up to date once after a restart, then only on transitions
+            if self.opening_hours_task is None:
+                self.load_opening_hours_message_id()
+                self.refresh_open_state()
+                if self.opening_hours_message_id:
+                    await self.update_opening_hours_message()
+                    print(f"Opening hours message updated: {self.opening_hours_message_id}")
+                else:
                     await self.create_opening_hours_message()
-            else:
-                await self.create_opening_hours_message()
-            
-            if not self.update_opening_hours_message.is_running():
-                self.update_opening_hours_message.start()
+                self.opening_hours_task = asyncio.create_task(self.run_opening_hours_scheduler())
+
+            if not self.refill_channel_pool.is_running():
+                await self.load_channel_pool()
+                self.refill_channel_pool.start()
 
         except Exception as e:
             print(f"Error starting ticket system: {e}")
@@ -614,48 +1469,69 @@ class TicketSystem(commands.Cog):
             if default_channel:
                 await self.create_ticket_message(default_channel)
 
-    async def check_and_update_rating_messages(self):
+    async def reconcile_rating_messages(self):
+        """Switch rated rating requests to the disabled view once, with bounded concurrency
+
+        Requests that show their final state are marked as reconciled and never touched
+        again. With the stored DM channel id an edit is a single REST call.
+        """
+        started = time.perf_counter()
+        rest_calls = 0
+        reconciled = []
+        failed = 0
         try:
-            rating_messages_path = "data/rating_messages.json"
-            if os.path.exists(rating_messages_path):
-                with open(rating_messages_path, "r") as f:
-                    rating_messages = json.load(f)
-
-                for message_id, data in rating_messages.items():
-                    if message_id in self.submitted_ratings:
-                        user_id = data.get("user_id")
-                        if user_id:
-                            try:
-                                user = await self.bot.fetch_user(int(user_id))
-                                if user:
-                                    try:
-                                        channel = await user.create_dm()
-                                        message = await channel.fetch_message(int(message_id))
-
-                                        rating = self.submitted_ratings[message_id]
-                                        avg = self.get_average_rating()
-                                        count = self.ratings.get("count", 0)
-
-                                        disabled_view = RatingViewDisabled(rating=rating, avg=avg, count=count)
-                                        await message.edit(view=disabled_view)
-                                        print(f"Rating message {message_id} for user {user_id} updated")
-                                    except discord.NotFound:
-                                        print(f"Rating message {message_id} not found")
-                                    except Exception as e:
-                                        print(f"Error updating rating message {message_id}: {e}")
-                            except Exception as e:
-                                print(f"Error loading user {user_id}: {e}")
+            cutoff = time.time() - RATING_MESSAGE_RETENTION_DAYS * 86400
+            pruned = await self.store.prune_rating_messages(cutoff)
+            pending = [
+                data for data in await self.store.get_unreconciled_rating_messages()
+                if str(data["message_id"]) in self.submitted_ratings
+            ]
+            semaphore = asyncio.Semaphore(RECONCILE_CONCURRENCY)
+            avg = self.get_average_rating()
+            count = self.ratings.get("count", 0)
+
+            async def reconcile(data):
+                nonlocal rest_calls, failed
+                message_id = data["message_id"]
+                rating = self.submitted_ratings[str(message_id)]
+                async with semaphore:
+                    try:
+                        channel_id = data.get("channel_id")
+                        if channel_id:
+                            channel = self.bot.get_partial_messageable(channel_id, type=discord.ChannelType.private)
+                        else:
+                            user = self.bot.get_user(int(data["user_id"]))
+                            if user is None:
+                                user = await self.bot.fetch_user(int(data["user_id"]))
+                                rest_calls += 1
+                            if user.dm_channel is None:
+                                rest_calls += 1
+                            channel = await user.create_dm()
+                        rest_calls += 1
+                        await channel.get_partial_message(message_id).edit(
+                            view=RatingViewDisabled(rating=rating, avg=avg, count=count)
+                        )
+                        reconciled.append(message_id)
+                    except (discord.NotFound, discord.Forbidden):
+                        # Deleted message or closed DMs, there is nothing left to update
+                        reconciled.append(message_id)
+                    except Exception as e:
+                        failed += 1
+                        print(f"Error updating rating message {message_id}: {e}")
+
+            await asyncio.gather(*(reconcile(data) for data in pending))
+            if reconciled:
+                await self.store.mark_reconciled(reconciled)
+            duration = time.perf_counter() - started
+            print(
+                f"Rating messages reconciled in {duration:.2f}s: {len(reconciled)} done, {failed} failed, "
+                f"{pruned} pruned, {rest_calls} REST calls"
+            )
         except Exception as e:
             print(f"Error checking rating messages: {e}")
 
     async def create_ticket_message(self, channel):
-        container = Container()
-        banner = discord.ui.MediaGallery()
-        banner.add_item("https://media.discordapp.net/attachments/1420436338284695657/1428764647300927600/support-tickets.png?ex=68f501c5&is=68f3b045&hm=59aea2e4d0f6f5cf4b1c44beadef1be9fd71533bfc4a96dbbf5b8ddfdfca5bdd&=&format=webp&quality=lossless&width=1730&height=374")
-        container.add_item(banner)
-        container.add_text("# Ticket System")
-        container.add_separator(spacing=SeparatorSpacingSize.small)
-        container.add_text("Here you have the opportunity to create a ticket so that a dedicated team member can take care of your concern as quickly as possible. We are here to help and support you to assist you in the best possible way.")
+        container = render("ticket_panel")
         view = discord.ui.View(container, timeout=None)
         try:
             if not self.ticket_create_view:
@@ -684,7 +1560,8 @@ class TicketSystem(commands.Cog):
         except Exception as e:
             print(f"Error saving message information: {e}")
 
-    async def send_average_rating(self, interaction, ephemeral=True):
+    def build_average_rating(self):
+        """Description, distribution and footer of the rating average embed"""
         avg = self.get_average_rating()
         avg_formatted = f"{avg:.1f}"
 
@@ -695,22 +1572,45 @@ class TicketSystem(commands.Cog):
         if has_half_star:
             stars += "✨"
 
+        def format_histogram(histogram):
+            return "\n".join(
+                f"{'⭐' * stars}: {count} rating(s)" for stars, count in enumerate(histogram, 1) if count > 0
+            ) or None
+
+        recent = self.get_recent_histogram()
+        recent_count = sum(recent)
+        recent_text = format_histogram(recent)
+        if recent_text:
+            recent_avg = sum(stars * count for stars, count in enumerate(recent, 1)) / recent_count
+            recent_text = f"Average {recent_avg:.1f}/5 from {recent_count} rating(s)\n{recent_text}"
+
+        return {
+            "description": f"Our current average rating is {stars} ({avg_formatted}/5)",
+            "distribution": format_histogram(self.ratings["histogram"]),
+            "recent": recent_text,
+            "footer": f"Based on {self.ratings.get('count', 0)} ratings"
+        }
+
+    async def send_average_rating(self, interaction, ephemeral=True):
+        # The rendered values only change when a rating is added or the day changes
+        key = f"rating_average:{self.rating_cache_version}:{datetime.now(self.timezone).date()}"
+        rendered = await self.response_cache.get(key)
+        if rendered is None:
+            rendered = self.build_average_rating()
+            await self.response_cache.set(key, rendered, ttl=RESPONSE_CACHE_TTL)
+
         embed = discord.Embed(
             title="Rating Average",
-            description=f"Our current average rating is {stars} ({avg_formatted}/5)",
+            description=rendered["description"],
             color=discord.Color.gold()
         )
 
-        if "ratings" in self.ratings and self.ratings["ratings"]:
-            ratings_count = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-            for r in self.ratings["ratings"]:
-                if r in ratings_count:
-                    ratings_count[r] += 1
+        if rendered["distribution"]:
+            embed.add_field(name="Distribution", value=rendered["distribution"])
+        if rendered["recent"]:
+            embed.add_field(name=f"Last {RATING_WINDOW_DAYS} Days", value=rendered["recent"])
 
-            stats = "\n".join([f"{'⭐' * i}: {count} rating(s)" for i, count in ratings_count.items() if count > 0])
-            embed.add_field(name="Distribution", value=stats)
-
-        embed.set_footer(text=f"Based on {self.ratings.get('count', 0)} ratings")
+        embed.set_footer(text=rendered["footer"])
 
         try:
             if interaction.response.is_done():
@@ -724,17 +1624,460 @@ class TicketSystem(commands.Cog):
             except:
                 pass
 
-    async def log_ticket_action(self, guild_id, action, ticket_name, user=None):
-        """Logs ticket actions in a log channel"""
-        guild = self.bot.get_guild(guild_id)
-        if not guild:
+    async def load_open_tickets(self):
+        """Rebuild the creator -> open ticket channels index and the claim dispatcher from the store"""
+        open_tickets = {}
+        dispatcher = ClaimDispatcher()
+        stale = []
+        for ticket in await self.store.get_open_tickets():
+            # Channels deleted while the bot was offline (or imported from ticket_info.json
+            # long after) would block their creator for good. Imported rows have no guild_id
+            # and are looked up in the bot's channel cache; rows of a guild that is
+            # unavailable right now cannot be checked and are kept.
+            guild = self.bot.get_guild(ticket["guild_id"]) if ticket["guild_id"] else None
+            if ticket["guild_id"] is None or (guild is not None and not guild.unavailable):
+                get_channel = guild.get_channel if guild else self.bot.get_channel
+                if get_channel(ticket["channel_id"]) is None:
+                    stale.append(ticket["channel_id"])
+                    continue
+            open_tickets.setdefault(ticket["creator_id"], []).append(ticket["channel_id"])
+            if ticket["status"] == "claimed" and ticket["claimed_by"]:
+                dispatcher.change_load(ticket["claimed_by"], 1)
+            else:
+                dispatcher.add_ticket(ticket["channel_id"], ticket["opened_at"])
+        for staff_id in await self.store.get_available_staff():
+            dispatcher.set_available(staff_id, True)
+        if stale:
+            await self.store.close_stale(stale)
+            print(f"Closed {len(stale)} open tickets whose channels no longer exist")
+        self.open_tickets = open_tickets
+        self.dispatcher = dispatcher
+        self.open_tickets_loaded = True
+        print(f"Indexed {sum(len(channels) for channels in open_tickets.values())} open tickets of {len(open_tickets)} users, "
+              f"{len(dispatcher.waiting)} unclaimed, {len(dispatcher.available)} staff available")
+        self.schedule_dispatch()
+
+    def forget_open_ticket(self, creator_id, channel_id):
+        channels = self.open_tickets.get(creator_id)
+        if channels and channel_id in channels:
+            channels.remove(channel_id)
+            if not channels:
+                del self.open_tickets[creator_id]
+
+    def track_claim(self, previous, ticket):
+        if previous and previous["claimed_by"]:
+            self.dispatcher.change_load(previous["claimed_by"], -1)
+        self.dispatcher.remove_ticket(ticket["channel_id"])
+        self.dispatcher.change_load(ticket["claimed_by"], 1)
+
+    def track_release(self, previous, ticket):
+        released_by = previous["claimed_by"] if previous else None
+        if released_by:
+            self.dispatcher.change_load(released_by, -1)
+        self.dispatcher.add_ticket(ticket["channel_id"], ticket["opened_at"], released_by=released_by)
+        self.schedule_dispatch()
+
+    def track_close(self, ticket):
+        if ticket["claimed_by"]:
+            self.dispatcher.change_load(ticket["claimed_by"], -1)
+        self.dispatcher.remove_ticket(ticket["channel_id"])
+        self.schedule_dispatch()
+
+    def schedule_dispatch(self):
+        # A running dispatch keeps assigning until nothing is left, so one task at a time is enough
+        if self.dispatch_task is None or self.dispatch_task.done():
+            self.dispatch_task = asyncio.create_task(self.dispatch_tickets())
+
+    async def dispatch_tickets(self):
+        """Assign unclaimed tickets, oldest first, to the least-loaded available staff member"""
+        while True:
+            assignment = self.dispatcher.next_assignment(DISPATCH_MAX_CLAIMS)
+            if assignment is None:
+                return
+            channel_id, staff_id = assignment
+            self.dispatcher.remove_ticket(channel_id)
+            try:
+                channel = self.bot.get_channel(channel_id)
+                if channel is None:
+                    continue
+                member = channel.guild.get_member(staff_id)
+                if member is None:
+                    try:
+                        member = await channel.guild.fetch_member(staff_id)
+                    except discord.NotFound:
+                        # Staff who left the server are no longer available
+                        self.dispatcher.set_available(staff_id, False)
+                        await self.store.set_staff_available(staff_id, False)
+                        ticket = await self.store.get(channel_id)
+                        if ticket and ticket["status"] == "open":
+                            self.dispatcher.add_ticket(channel_id, ticket["opened_at"])
+                        continue
+
+                previous = await self.store.get(channel_id)
+                ticket = await self.store.claim(channel_id, staff_id)
+                if not ticket:
+                    continue
+                self.track_claim(previous, ticket)
+                await self.announce_claim(channel, member, ticket, assigned=True)
+                print(f"Ticket {channel.name} assigned to {member.name} ({self.dispatcher.loads.get(staff_id, 0)} open claims)")
+            except Exception as e:
+                print(f"Error assigning ticket {channel_id}: {e}")
+
+    async def announce_claim(self, channel, member, ticket, assigned=False):
+        """Give the claiming staff member access, post the claim panel and notify the creator (and an assigned staff member)"""
+        if ticket and ticket["first_claimed_at"] == ticket["claimed_at"]:
+            await self.record_sla(ticket, "wait")
+        await channel.set_permissions(member, read_messages=True, send_messages=True)
+
+        container = render("ticket_assigned" if assigned else "ticket_claimed", staff=member.mention)
+
+        view = discord.ui.View(container, timeout=None)
+        await channel.send(view=view)
+
+        try:
+            creator_id = ticket["creator_id"] if ticket else None
+            if creator_id:
+                user = self.bot.get_user(int(creator_id))
+                if user:
+                    dm_embed = discord.Embed(
+                        title="Ticket Update",
+                        description=f"Your ticket **{channel.name}** has been claimed by {member.mention}.",
+                        color=discord.Color.green()
+                    )
+                    try:
+                        await user.send(embed=dm_embed)
+                    except discord.Forbidden:
+                        print(f"Could not send DM to user {creator_id} - DMs disabled")
+        except Exception as e:
+            print(f"Error sending claim notification: {e}")
+
+        if assigned:
+            try:
+                await member.send(embed=discord.Embed(
+                    title="Ticket Assigned",
+                    description=f"The ticket {channel.mention} has been assigned to you.",
+                    color=discord.Color.blue()
+                ))
+            except discord.Forbidden:
+                print(f"Could not send DM to staff member {member.id} - DMs disabled")
+
+    @ticket.command(name="available", description="Receive unclaimed tickets automatically (Staff only)")
+    @commands.has_permissions(manage_channels=True)
+    async def staff_available(self, ctx):
+        await self.store.set_staff_available(ctx.author.id, True)
+        self.dispatcher.set_available(ctx.author.id, True)
+        await ctx.respond(
+            f"You now receive unclaimed tickets automatically, up to {DISPATCH_MAX_CLAIMS} at a time. "
+            f"You have {self.dispatcher.loads.get(ctx.author.id, 0)} open claim(s), {len(self.dispatcher.waiting)} ticket(s) are waiting.",
+            ephemeral=True
+        )
+        self.schedule_dispatch()
+
+    @ticket.command(name="away", description="Stop receiving tickets automatically (Staff only)")
+    @commands.has_permissions(manage_channels=True)
+    async def staff_away(self, ctx):
+        await self.store.set_staff_available(ctx.author.id, False)
+        self.dispatcher.set_available(ctx.author.id, False)
+        await ctx.respond("You no longer receive tickets automatically.", ephemeral=True)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        # Ticket channels deleted by hand are closed as well, so they do not count as open
+        ticket = await self.store.close(channel.id)
+        if ticket:
+            self.forget_open_ticket(ticket["creator_id"], channel.id)
+            self.track_close(ticket)
+            await self.record_sla(ticket, "handle")
+
+    async def record_sla(self, ticket, metric):
+        """Count the wait time of a first claim or the handle time of a close into the SLA histograms
+
+        Tickets closed without a claim count as handled from their opening by "unclaimed" (0).
+        """
+        try:
+            if metric == "wait":
+                start, end, staff_id = ticket["opened_at"], ticket["first_claimed_at"], ticket["claimed_by"]
+            else:
+                start, end, staff_id = ticket["claimed_at"] or ticket["opened_at"], ticket["closed_at"], ticket["claimed_by"] or 0
+            day = datetime.fromtimestamp(end, self.timezone).strftime("%Y-%m-%d")
+            hour = datetime.fromtimestamp(ticket["opened_at"], self.timezone).hour
+            await self.store.add_sla_sample(day, metric, staff_id, hour, end - start)
+        except Exception as e:
+            print(f"Error recording {metric} time of ticket {ticket.get('name')}: {e}")
+
+    @ticket.command(name="sla", description="Show wait and handle time percentiles per staff member and hour (Staff only)")
+    @commands.has_permissions(manage_channels=True)
+    async def sla_stats(
+        self,
+        ctx,
+        days: Option(int, "Number of days to include", min_value=1, max_value=SLA_RETENTION_DAYS, default=7)
+    ):
+        since = (datetime.now(self.timezone) - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        histograms = {
+            (metric, dimension): await self.store.get_sla_histograms(metric, dimension, since)
+            for metric in ("wait", "handle") for dimension in ("staff", "hour")
+        }
+
+        def merge(*parts):
+            merged = {}
+            for part in parts:
+                for bucket, count in part.items():
+                    merged[bucket] = merged.get(bucket, 0) + count
+            return merged
+
+        def describe(histogram):
+            values = sla_percentiles(histogram)
+            if not values:
+                return "no data"
+            return " / ".join(format_duration(value) for value in values) + f" ({sum(histogram.values())})"
+
+        def limit(lines):
+            text = ""
+            for line in lines:
+                if len(text) + len(line) + 1 > 1024:
+                    break
+                text += line + "\n"
+            return text or "No data"
+
+        embed = discord.Embed(
+            title=f"⏱️ Ticket SLA - Last {days} Day(s)",
+            description="p50 / p90 / p99 (tickets)",
+            color=discord.Color.blue(),
+            timestamp=discord.utils.utcnow()
+        )
+        # Every ticket has an hour, so the hour histograms add up to the totals
+        embed.add_field(name="Wait (open → claim)", value=describe(merge(*histograms["wait", "hour"].values())))
+        embed.add_field(name="Handle (claim → close)", value=describe(merge(*histograms["handle", "hour"].values())))
+
+        staff_ids = sorted(
+            set(histograms["wait", "staff"]) | set(histograms["handle", "staff"]),
+            key=lambda staff_id: -sum(histograms["handle", "staff"].get(staff_id, {}).values())
+        )
+        embed.add_field(
+            name="By Staff Member (wait | handle)",
+            value=limit(
+                f"{f'<@{staff_id}>' if staff_id else 'Unclaimed'}: "
+                f"{describe(histograms['wait', 'staff'].get(staff_id, {}))} | "
+                f"{describe(histograms['handle', 'staff'].get(staff_id, {}))}"
+                for staff_id in staff_ids
+            ),
+            inline=False
+        )
+        embed.add_field(
+            name="By Hour Opened (wait | handle)",
+            value=limit(
+                f"{hour:02d}:00: {describe(histograms['wait', 'hour'].get(hour, {}))} | "
+                f"{describe(histograms['handle', 'hour'].get(hour, {}))}"
+                for hour in range(24)
+                if hour in histograms["wait", "hour"] or hour in histograms["handle", "hour"]
+            ),
+            inline=False
+        )
+        await ctx.respond(embed=embed, ephemeral=True)
+
+    def pool_overwrites(self, guild):
+        """Pooled channels are hidden from everyone but the bot until they are taken"""
+        return {
+            guild.default_role: discord.PermissionOverwrite(read_messages=False, send_messages=False),
+            guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_channels=True)
+        }
+
+    async def load_channel_pool(self):
+        """Pick up the pooled channels that are left over from before a restart"""
+        category = self.bot.get_channel(TICKET_CATEGORY_ID)
+        if not category:
+            return
+        for channel in category.text_channels:
+            if channel.name != TICKET_POOL_NAME or channel.id in self.channel_pool:
+                continue
+            try:
+                # A channel created right before a restart may not have its panel yet
+                if channel.last_message_id is None:
+                    await channel.send(view=TicketSystemView(render("ticket_welcome")))
+                self.channel_pool.append(channel.id)
+            except discord.HTTPException as e:
+                print(f"Error restoring pooled channel {channel.id}: {e}")
+        print(f"Ticket channel pool restored with {len(self.channel_pool)} channel(s)")
+
+    async def take_pool_channel(self, guild, name, overwrites):
+        """Rename and unhide a pooled channel in one request; None if the pool is empty"""
+        if guild.get_channel(TICKET_CATEGORY_ID) is not None:
+            while self.channel_pool:
+                channel = guild.get_channel(self.channel_pool.pop(0))
+                if channel is None:
+                    continue
+                try:
+                    # The cached channel keeps the pool name until the update event arrives,
+                    # the returned one has the name Discord stored for the ticket
+                    edited = await channel.edit(name=name, overwrites=overwrites)
+                except discord.HTTPException as e:
+                    print(f"Error taking pooled channel {channel.id}: {e}")
+                    continue
+                self.pool_metrics["hits"] += 1
+                return edited or channel
+        self.pool_metrics["misses"] += 1
+        return None
+
+    @tasks.loop(seconds=TICKET_POOL_REFILL_SECONDS)
+    async def refill_channel_pool(self):
+        # One channel per iteration keeps refills at a pace the rate limits allow
+        if len(self.channel_pool) >= TICKET_POOL_SIZE:
+            return
+        category = self.bot.get_channel(TICKET_CATEGORY_ID)
+        if not category:
             return
 
-        log_channel_id = 1421833160492187759
-        log_channel = guild.get_channel(log_channel_id)
-        if not log_channel:
+        started = time.perf_counter()
+        try:
+            channel = await category.guild.create_text_channel(
+                name=TICKET_POOL_NAME,
+                category=category,
+                overwrites=self.pool_overwrites(category.guild)
+            )
+            await channel.send(view=TicketSystemView(render("ticket_welcome")))
+        except discord.HTTPException as e:
+            print(f"Error refilling ticket channel pool: {e}")
             return
+        self.channel_pool.append(channel.id)
+
+        latency = time.perf_counter() - started
+        self.pool_metrics["refills"] += 1
+        self.pool_metrics["refill_seconds"] += latency
+        self.pool_metrics["last_refill_seconds"] = latency
+
+    @ticket.command(name="pool", description="Show the ticket channel pool and its hit rate (Admin only)")
+    @commands.has_permissions(administrator=True)
+    async def pool_stats(self, ctx):
+        metrics = self.pool_metrics
+        opened = metrics["hits"] + metrics["misses"]
+        average = metrics["refill_seconds"] / metrics["refills"] if metrics["refills"] else 0.0
+        embed = discord.Embed(title="🎫 Ticket Channel Pool", color=discord.Color.blue(), timestamp=discord.utils.utcnow())
+        embed.add_field(name="Ready", value=f"{len(self.channel_pool)}/{TICKET_POOL_SIZE} channel(s)")
+        embed.add_field(
+            name="Tickets Opened",
+            value=f"**Hits:** {metrics['hits']:,}\n"
+                  f"**Misses:** {metrics['misses']:,}\n"
+                  f"**Hit Rate:** {(metrics['hits'] / opened if opened else 0) * 100:.1f}%"
+        )
+        embed.add_field(
+            name="Refills",
+            value=f"**Channels:** {metrics['refills']:,}\n"
+                  f"**Average:** {average * 1000:.0f} ms\n"
+                  f"**Last:** {metrics['last_refill_seconds'] * 1000:.0f} ms"
+        )
+        await ctx.respond(embed=embed, ephemeral=True)
+
+    async def archive_transcript(self, channel):
+        """Stream the history of a ticket channel into a gzip NDJSON transcript
+
+        Pages go to a writer thread through a small bounded queue, so memory stays flat
+        however long the ticket is. Returns once every message has been read; the
+        returned task finishes the file and logs its size and duration.
+        """
+        started = time.perf_counter()
+        os.makedirs(TRANSCRIPT_DIR, exist_ok=True)
+        path = os.path.join(TRANSCRIPT_DIR, f"{channel.id}.ndjson.gz")
+        writer = TranscriptWriter(path)
+        pages = asyncio.Queue(maxsize=TRANSCRIPT_QUEUE_PAGES)
+        guild_id = channel.guild.id
+        ticket_name = channel.name
+
+        async def drain():
+            try:
+                indexed = True
+                while True:
+                    page = await pages.get()
+                    if page is None:
+                        break
+                    await asyncio.to_thread(writer.write_page, page)
+                    try:
+                        await self.store.add_search_entries(channel.id, page)
+                    except Exception as e:
+                        # The transcript is still saved; it is indexed again after the next restart
+                        print(f"Error indexing transcript of {ticket_name}: {e}")
+                        indexed = False
+                size = await asyncio.to_thread(writer.close)
+                duration = time.perf_counter() - started
+                await self.store.set_transcript(channel.id, path, indexed)
+                print(f"Transcript of {ticket_name} archived: {writer.messages} messages, {size} bytes, {duration:.2f}s")
+                await self.log_ticket_action(
+                    guild_id=guild_id,
+                    action=f"Transcript archived ({writer.messages} messages, {size / 1024:.1f} KiB, {duration:.2f}s)",
+                    ticket_name=ticket_name
+                )
+            except Exception as e:
+                print(f"Error writing transcript of {ticket_name}: {e}")
+
+        task = asyncio.create_task(drain())
+        self.transcript_tasks.add(task)
+        task.add_done_callback(self.transcript_tasks.discard)
+
+        page = []
+        try:
+            async for message in channel.history(limit=None, oldest_first=True):
+                page.append(transcript_entry(message))
+                if len(page) >= TRANSCRIPT_PAGE_SIZE:
+                    await pages.put(page)
+                    page = []
+        finally:
+            if page:
+                await pages.put(page)
+            await pages.put(None)
+        return task
+
+    async def index_archived_transcripts(self):
+        """Index transcripts archived before the search index existed or whose indexing failed"""
+        started = time.perf_counter()
+        indexed = messages = 0
+        for ticket in await self.store.get_unindexed_transcripts():
+            try:
+                if not os.path.exists(ticket["transcript_path"]):
+                    continue
+                entries = await asyncio.to_thread(read_transcript, ticket["transcript_path"])
+                await self.store.reindex_transcript(ticket["channel_id"], ticket["transcript_path"], entries)
+                indexed += 1
+                messages += len(entries)
+            except Exception as e:
+                print(f"Error indexing transcript {ticket['transcript_path']}: {e}")
+        if indexed:
+            print(f"Indexed {indexed} archived transcripts ({messages} messages) in {time.perf_counter() - started:.2f}s")
+
+    @ticket.command(name="search", description="Search the transcripts of closed tickets (Staff only)")
+    @commands.has_permissions(manage_channels=True)
+    async def search_transcripts(self, ctx, query: Option(str, "Words that must appear in the message")):
+        if not query.split():
+            await ctx.respond("❌ Please enter at least one word to search for.", ephemeral=True)
+            return
+
+        started = time.perf_counter()
+        try:
+            results = await self.store.search_transcripts(query)
+        except Exception as e:
+            print(f"Error searching transcripts: {e}")
+            await ctx.respond("❌ An error occurred while searching the transcripts.", ephemeral=True)
+            return
+        duration = time.perf_counter() - started
+
+        embed = discord.Embed(
+            title=f"🔎 Transcript Search: {query[:200]}",
+            color=discord.Color.blue(),
+            timestamp=discord.utils.utcnow()
+        )
+        if not results:
+            embed.description = "No archived ticket messages match your search."
+        for result in results:
+            created_at = int(datetime.fromisoformat(result["created_at"]).timestamp())
+            embed.add_field(
+                name=result.get("name") or f"Ticket {result['channel_id']}",
+                value=f"{result['snippet'][:900]}\n-# {result['author']} • <t:{created_at}:f> • "
+                      f"{'<@' + str(result['creator_id']) + '>' if result.get('creator_id') else 'unknown creator'}",
+                inline=False
+            )
+        embed.set_footer(text=f"{len(results)} ticket(s) in {duration * 1000:.0f} ms")
+        await ctx.respond(embed=embed, ephemeral=True)
 
+    async def log_ticket_action(self, guild_id, action, ticket_name, user=None):
+        """Queues a ticket action for the log channel; the log writer sends it"""
         embed = discord.Embed(
             title="Ticket Log",
             description=f"**Action:** {action}\n**Ticket:** {ticket_name}",
@@ -746,8 +2089,129 @@ class TicketSystem(commands.Cog):
             embed.add_field(name="User", value=f"{user.mention} ({user.name})")
             embed.set_thumbnail(url=user.display_avatar.url)
 
-        await log_channel.send(embed=embed)
+        self.log_queue.put_nowait((guild_id, embed))
+
+    async def run_log_writer(self):
+        """Send queued log entries in order, up to LOG_BATCH_SIZE embeds per message"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                batch = [await self.log_queue.get()]
+                deadline = loop.time() + LOG_FLUSH_SECONDS
+                while len(batch) < LOG_BATCH_SIZE:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.log_queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                # A message goes to one guild's log channel, so a batch is split where the guild changes
+                run = []
+                for entry in batch:
+                    if run and entry[0] != run[0][0]:
+                        await self.flush_log_entries(run)
+                        run = []
+                    run.append(entry)
+                await self.flush_log_entries(run)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in ticket log writer: {e}")
+            # Sent or dropped, either way shutdown() no longer waits for them
+            for _ in batch:
+                self.log_queue.task_done()
+
+    async def flush_log_entries(self, entries):
+        started = time.perf_counter()
+        guild = self.bot.get_guild(entries[0][0])
+        log_channel = guild.get_channel(TICKET_LOG_CHANNEL_ID) if guild else None
+        if not log_channel:
+            self.log_metrics["dropped"] += len(entries)
+            return
+
+        embeds = [embed for _, embed in entries]
+        for attempt in range(LOG_MAX_RETRIES + 1):
+            try:
+                await log_channel.send(embeds=embeds)
+                break
+            except discord.HTTPException as e:
+                # Only the writer waits; interactions keep queueing behind it
+                if (e.status == 429 or e.status >= 500) and attempt < LOG_MAX_RETRIES:
+                    self.log_metrics["retries"] += 1
+                    await asyncio.sleep(2 ** attempt)
+                    continue
+                print(f"Error sending {len(embeds)} ticket log entries: {e}")
+                self.log_metrics["dropped"] += len(entries)
+                return
+
+        latency = time.perf_counter() - started
+        self.log_metrics["messages"] += 1
+        self.log_metrics["entries"] += len(entries)
+        self.log_metrics["flush_seconds"] += latency
+        self.log_metrics["last_flush_seconds"] = latency
+
+    @ticket.command(name="log", description="Show the ticket log queue and flush latency (Admin only)")
+    @commands.has_permissions(administrator=True)
+    async def log_stats(self, ctx):
+        metrics = self.log_metrics
+        messages = metrics["messages"]
+        embed = discord.Embed(title="📝 Ticket Log Writer", color=discord.Color.blue(), timestamp=discord.utils.utcnow())
+        embed.add_field(name="Queued", value=f"{self.log_queue.qsize():,} entries")
+        embed.add_field(
+            name="Sent",
+            value=f"**Messages:** {messages:,}\n"
+                  f"**Entries:** {metrics['entries']:,}\n"
+                  f"**Per Message:** {metrics['entries'] / messages if messages else 0:.1f}"
+        )
+        embed.add_field(
+            name="Flushes",
+            value=f"**Average:** {metrics['flush_seconds'] / messages * 1000 if messages else 0:.0f} ms\n"
+                  f"**Last:** {metrics['last_flush_seconds'] * 1000:.0f} ms\n"
+                  f"**Retries:** {metrics['retries']:,} | **Dropped:** {metrics['dropped']:,}"
+        )
+        await ctx.respond(embed=embed, ephemeral=True)
+
+    def cog_unload(self):
+        self.refill_channel_pool.cancel()
+        try:
+            self.shutdown_task = asyncio.get_running_loop().create_task(self.shutdown())
+        except RuntimeError:
+            pass
+
+    async def shutdown(self):
+        """Finish transcripts and queued log entries, stop the background tasks and close the database
+
+        Called on unload and on bot shutdown (see main.py). The aiosqlite worker thread
+        is not a daemon, an open connection keeps the process from exiting.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self.refill_channel_pool.cancel()
+
+        # Transcripts still write to the database and queue a log entry each
+        await asyncio.gather(*self.transcript_tasks, return_exceptions=True)
+
+        if not self.log_queue.empty() and self.log_task is None:
+            self.log_task = asyncio.create_task(self.run_log_writer())
+        try:
+            await asyncio.wait_for(self.log_queue.join(), LOG_SHUTDOWN_SECONDS)
+        except asyncio.TimeoutError:
+            print(f"Ticket log writer did not finish, {self.log_queue.qsize()} entries dropped")
+
+        tasks = [
+            task for task in (
+                self.log_task, self.reconcile_task, self.search_index_task, self.dispatch_task, self.opening_hours_task
+            ) if task is not None
+        ]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.store.close_db()
 
 
 def setup(bot):
-    bot.add_cog(TicketSystem(bot))
\ No newline at end of file
+    bot.add_cog(TicketSystem(bot))
+
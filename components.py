@@ -0,0 +1,195 @@
+"""Component templates for the Container views of the cogs
+
+Banner URLs and panel texts are configured here. A template keeps only the
+payload data of its parts (banner URL, texts, separator spacing); render()
+creates fresh items from it for every message. Items must not be shared between
+views: sending a view refreshes its items with the components Discord returns
+and sets their parent to the Container they were added to. Building an item
+costs about as much as copying one, so a rendered panel costs the same as one
+built by hand; the templates are the single place where panels are configured.
+"""
+from discord import SeparatorSpacingSize
+from discord.ui import Container, MediaGallery, Separator, TextDisplay
+
+BANNERS = {
+    "support_tickets": "https://media.discordapp.net/attachments/1420436338284695657/1428764647300927600/support-tickets.png?ex=68f501c5&is=68f3b045&hm=59aea2e4d0f6f5cf4b1c44beadef1be9fd71533bfc4a96dbbf5b8ddfdfca5bdd&=&format=webp&quality=lossless&width=1730&height=374",
+    "support_times": "https://media.discordapp.net/attachments/1420436338284695657/1428764647779205270/support-times.png?ex=68f3b045&is=68f25ec5&hm=244c1fcb00a51a17e3de1e7b290493f225778eb073b0811255386eeacff5376a&=&format=webp&quality=lossless&width=1208&height=261",
+    "support_rating": "https://media.discordapp.net/attachments/1420436338284695657/1428764646973898773/support-rating.png?ex=68f3b045&is=68f25ec5&hm=4db9d39e0ad0c37f5ba59acbf0539a2e9e9249ee0e8ba0164f4cd5b38ff06012&=&format=webp&quality=lossless&width=1208&height=261",
+    "server_status": "https://cdn.discordapp.com/attachments/1420436338284695657/1429104060879077467/server-status.png?ex=68f4ec5f&is=68f39adf&hm=118309b93d12c227d7c8ae69e573ed739f96dcfc2f6dfc42f980e25b59a10c2e&",
+    "server_rules": "https://cdn.discordapp.com/attachments/1420436338284695657/1428764646650679316/server-rules.png?ex=68f3b044&is=68f25ec4&hm=c2cbb71a7dbef0982116668881cef37933785e8ac7cb9d8a540f15ae7b578fcc&"
+}
+
+EMOJI = "<:dot:1421834173127069778>"
+
+
+def banner(name):
+    return ("banner", name)
+
+
+def text(content):
+    return ("text", content)
+
+
+def slot(content):
+    """Text with str.format() fields, filled in by render()"""
+    return ("slot", content)
+
+
+def separator():
+    return ("separator", SeparatorSpacingSize.small)
+
+
+class ComponentTemplate:
+    def __init__(self, *parts):
+        # Banner names are resolved once, everything else is kept as given
+        self.parts = [("banner", BANNERS[value]) if kind == "banner" else (kind, value) for kind, value in parts]
+
+    def render(self, **values):
+        # Every message gets its own Container and its own items
+        container = Container()
+        for kind, value in self.parts:
+            if kind == "banner":
+                gallery = MediaGallery()
+                gallery.add_item(value)
+                container.add_item(gallery)
+            elif kind == "text":
+                container.add_item(TextDisplay(value))
+            elif kind == "slot":
+                container.add_item(TextDisplay(value.format(**values)))
+            else:
+                container.add_item(Separator(spacing=value))
+        return container
+
+
+STATUS_FOOTER = "-# Powered by ManagerX"
+
+TEMPLATES = {
+    # Ticket system
+    "ticket_panel": ComponentTemplate(
+        banner("support_tickets"),
+        text("# Ticket System"),
+        separator(),
+        text("Here you have the opportunity to create a ticket so that a dedicated team member can take care of your concern as quickly as possible. We are here to help and support you to assist you in the best possible way.")
+    ),
+    "ticket_welcome": ComponentTemplate(
+        banner("support_tickets"),
+        text("## Welcome to Your Ticket"),
+        separator(),
+        text("A friendly and helpful team member will shortly take care of your request with patience and attention. We want to ensure you receive the best possible support and are always here to help you and answer your questions. Thank you for your trust – we look forward to helping you!")
+    ),
+    "support_closed": ComponentTemplate(
+        banner("support_times"),
+        text("## ⏰ Support Currently Closed"),
+        separator(),
+        slot("Our Support is currently closed.\n\n{hours}\n-# Please try again during our opening hours.")
+    ),
+    "ticket_claimed": ComponentTemplate(
+        banner("support_tickets"),
+        text("# Ticket Claimed"),
+        separator(),
+        slot("{staff} has claimed the ticket and will assist you shortly.")
+    ),
+    "ticket_assigned": ComponentTemplate(
+        banner("support_tickets"),
+        text("# Ticket Claimed"),
+        separator(),
+        slot("{staff} has been assigned to the ticket and will assist you shortly.")
+    ),
+    "ticket_released": ComponentTemplate(
+        banner("support_tickets"),
+        text("# Ticket Released"),
+        separator(),
+        slot("{staff} has released the ticket.")
+    ),
+    "ticket_rating": ComponentTemplate(
+        banner("support_rating"),
+        text("# Ticket Rating"),
+        separator(),
+        slot("Your ticket **{ticket_name}** has been closed.\nHow would you rate our support?")
+    ),
+
+    # Bot status, one template per /status choice
+    "status_failure": ComponentTemplate(
+        banner("server_status"),
+        slot("## 🔴 Failure for {bot}"),
+        separator(),
+        slot("**Reason:**\n{message}\n" + STATUS_FOOTER)
+    ),
+    "status_issue": ComponentTemplate(
+        banner("server_status"),
+        slot("## 🟠 Issue for {bot}"),
+        separator(),
+        slot("**Details:**\n{message}\n" + STATUS_FOOTER)
+    ),
+    "status_maintenance": ComponentTemplate(
+        banner("server_status"),
+        slot("## 🔵 Maintenance for {bot}"),
+        separator(),
+        slot("**Info:**\n{message}\n" + STATUS_FOOTER)
+    ),
+    "status_online": ComponentTemplate(
+        banner("server_status"),
+        slot("## 🟢 Online: {bot}"),
+        separator(),
+        slot("{message}\n" + STATUS_FOOTER)
+    ),
+
+    # Rules panel
+    "rules": ComponentTemplate(
+        banner("server_rules"),
+        text("## SERVER RULES & GUIDELINES"),
+        separator(),
+        text(
+            "Welcome to **OPPRO.NET Network**! Please read and accept our community guidelines.\n"
+            "**By joining this server, you agree to follow these rules and our digital house rights.**\n\n"
+        ),
+        text(
+            f"## 🤝 **Community Standards**\n"
+            f"{EMOJI} Be respectful and kind to all members\n"
+            f"{EMOJI} No harassment, hate speech, or discrimination\n"
+            f"{EMOJI} Keep conversations appropriate and family-friendly\n"
+            f"{EMOJI} No spam, excessive caps, or disruptive behavior\n"
+            f"{EMOJI} Political discussions are strictly prohibited\n\n"
+        ),
+        separator(),
+        text(
+            f"## 🚫 **Prohibited Content**\n"
+            f"{EMOJI} NSFW, illegal, or harmful content\n"
+            f"{EMOJI} Personal information or doxxing\n"
+            f"{EMOJI} Advertising without permission\n"
+            f"{EMOJI} Malware, viruses, or malicious links\n\n"
+        ),
+        separator(),
+        text(
+            f"## ⚖️ **Enforcement**\n"
+            f"{EMOJI} **1st Violation:** Warning\n"
+            f"{EMOJI} **2nd Violation:** Temporary timeout\n"
+            f"{EMOJI} **3rd Violation:** Permanent ban\n\n"
+        ),
+        separator(),
+        text(
+            f"## 🏠 **Digital House Rights**\n"
+            f"{EMOJI} **OPPRO.NET Network** reserves full moderation rights\n"
+            f"{EMOJI} Staff decisions are final and binding\n"
+            f"{EMOJI} We maintain the right to remove disruptive users\n"
+            f"{EMOJI} Server access is a privilege, not a right\n\n"
+        ),
+        text(
+            f"## 📞 **Support & Appeals**\n"
+            f"{EMOJI} Contact staff for questions or rule clarifications\n"
+            f"{EMOJI} Report violations through proper channels\n"
+            f"{EMOJI} Appeals must be submitted respectfully\n\n"
+        ),
+        slot(
+            "───────────────────────────────────\n"
+            "**© 2024 OPPRO.NET Network** • *Rules may be updated without notice*\n"
+            "**Total Verifications:** `{verifications}` • **Success Rate:** `{success_rate}%`"
+        )
+    )
+}
+
+
+def render(name, **values):
+    """Container of a registered template with its slots filled in"""
+    return TEMPLATES[name].render(**values)
+
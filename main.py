@@ -7,7 +7,28 @@ import os
 import requests
 channel_ID = 1270721758462214235
 intents = discord.Intents.default()
-bot = ezcord.Bot(debug_guilds=["1428835818792947884"], ready_event=ezcord.ReadyEvent.table_vertical, intents=intents)
+# Privileged: "Server Members Intent" and "Message Content Intent" must also be
+# enabled for the bot in the Developer Portal. The statistics cog needs the members
+# intent for its member counts and join/leave events; ticket transcripts and
+# /ticket search need the message content of the ticket messages.
+intents.members = True
+intents.message_content = True
+
+
+class Bot(ezcord.Bot):
+    async def close(self):
+        # Cogs are not unloaded on shutdown; let the ones with buffered state
+        # write it while the event loop is still running
+        for cog in list(self.cogs.values()):
+            if hasattr(cog, "shutdown"):
+                try:
+                    await cog.shutdown()
+                except Exception as e:
+                    print(f"Error shutting down {cog.qualified_name}: {e}")
+        await super().close()
+
+
+bot = Bot(debug_guilds=["1428835818792947884"], ready_event=ezcord.ReadyEvent.table_vertical, intents=intents)
 
 @bot.event
 async def on_ready():
@@ -0,0 +1,65 @@
+"""Randomized check of the DaySeries prefix sums against naive summation
+
+Run from the repository root: python -m pytest tests
+"""
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cogs.stats import DAILY_METRICS, DaySeries, GuildStats
+
+TODAY = 740000
+
+
+def check(series, days, rng):
+    low = min(days, default=TODAY) - 5
+    high = max(days, default=TODAY) + 5
+    for _ in range(20):
+        start = rng.randint(low, high)
+        end = rng.randint(start - 2, high)
+        assert series.range_sum(start, end) == sum(value for ordinal, value in days.items() if start <= ordinal <= end)
+    for ordinal in range(low, high + 1):
+        assert series.get(ordinal) == days.get(ordinal, 0)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_range_sums_match_naive_summation(seed):
+    rng = random.Random(seed)
+    series = DaySeries()
+    days = {}
+    newest = TODAY
+
+    for _ in range(500):
+        operation = rng.random()
+        if operation < 0.6:
+            # Live increment on the newest day, sometimes a new day starts
+            newest += rng.random() < 0.1
+            ordinal = newest
+        elif operation < 0.8:
+            # Backfilled or archived day older than the newest one, also before the origin
+            ordinal = newest - rng.randint(1, 60)
+        elif operation < 0.9:
+            cutoff = newest - rng.randint(0, 40)
+            series.trim_before(cutoff)
+            days = {day: value for day, value in days.items() if day >= cutoff}
+            check(series, days, rng)
+            continue
+        elif operation < 0.95:
+            # /stats reset replaces the guild's series with fresh ones
+            series = GuildStats(1).series[DAILY_METRICS[0]].days
+            days = {}
+            check(series, days, rng)
+            continue
+        else:
+            check(series, days, rng)
+            continue
+
+        amount = rng.randint(1, 50)
+        series.add(ordinal, amount)
+        days[ordinal] = days.get(ordinal, 0) + amount
+
+    check(series, days, rng)
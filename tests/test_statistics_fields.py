@@ -0,0 +1,73 @@
+"""/statistics fields with and without the members intent
+
+Run from the repository root: python -m pytest tests
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import discord
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cogs.stats import ServerStats
+
+
+class Bot:
+    def __init__(self, members_intent):
+        self.intents = discord.Intents.default()
+        self.intents.members = members_intent
+
+    async def wait_until_ready(self):
+        pass
+
+
+class Guild:
+    id = 1
+    name = "guild"
+    chunked = True
+    member_count = 3
+    channels = []
+    created_at = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    members = [SimpleNamespace(bot=False), SimpleNamespace(bot=False), SimpleNamespace(bot=True)]
+
+    async def chunk(self):
+        pass
+
+
+def build_fields(members_intent):
+    async def run():
+        stats = ServerStats(Bot(members_intent))
+        try:
+            guild = Guild()
+            await stats.seed_member_counts(guild)
+            for _ in range(14):
+                stats.add_stat(guild.id, "messages")
+            return await stats.build_statistics_fields(guild, 7, "Day")
+        finally:
+            stats.cog_unload()
+            await stats.shutdown_task
+
+    return {field["name"]: field["value"] for field in asyncio.run(run())}
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+
+
+def test_member_counts_unavailable_without_members_intent():
+    fields = build_fields(members_intent=False)
+    assert "**Current Members:** unavailable" in fields["🏠 Server Info"]
+    assert "**Activity Rate:** n/a" in fields["📈 Daily Averages"]
+
+
+def test_activity_rate_with_members_intent():
+    fields = build_fields(members_intent=True)
+    assert "**Current Members:** 2" in fields["🏠 Server Info"]
+    # 14 messages over 7 days from 2 human members
+    assert "**Activity Rate:** 100.0%" in fields["📈 Daily Averages"]